@@ -1,50 +1,75 @@
 import os
-import json
 import fitz  # PyMuPDF
-import pytesseract
-from PIL import Image, ImageDraw
+from PIL import Image
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import re
-import gc
+import math
+from contextlib import nullcontext
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import time
 from pathlib import Path
-from glob import glob
 
 from export_results import (
     OUTPUT_DIR,
 )
 
 from helper import logging_process, check_json_file_exists
+from result_writer import ResultWriter, load_completed_pages
+from model_registry import get_yolo_model, get_yolo_weights_hash
+from ocr_backend import OCR_LANG, OCR_OEM, OCR_PSM, get_ocr_backend
+from extraction_cache import config_hash, file_sha256, get_extraction_cache, iter_with_cached_pages
+from scheduler import METHOD_PYMU_TESSERACT
+from detection import DEFAULT_BATCH_SIZE, detect_batch, iter_page_detections, scale_bounding_boxes
+from page_analysis import PAGE_DIGITAL, classify_page
+from memory_guard import MemoryGuard
+from page_render import (
+    BufferPool,
+    binarize_image,
+    choose_detection_dpi,
+    choose_ocr_dpi,
+    pixmap_to_array,
+    pixmap_to_bgr,
+    render_page,
+    render_page_gray,
+)
+from page_pipeline import DEFAULT_OCR_WORKERS, DEFAULT_QUEUE_DEPTH, PagePipeline
 
 FOLDER_OUTPUT_PYMU_TESSERACT = OUTPUT_DIR / "pymu_tesseract_finetuned"
+REGION_PADDING = 10  # Pixels kept around a region crop for OCR
+INK_THRESHOLD = 200  # Gray values below this count as text ink
+NATIVE_TEXT_CONFIDENCE = 100.0  # Text layer content is exact, no OCR uncertainty
+MAX_SHARD_SIZE = 32  # Upper bound of pages per shard when splitting a document
+OCR_BINARIZE = None  # BINARIZE_OTSU / BINARIZE_ADAPTIVE to binarize the OCR renders
 
-def get_latest_yolo_model_path(yolo_dir="app/yolo"):
+def page_to_image(page, dpi=None, binarize=OCR_BINARIZE, pool=None):
     """
-    Get the latest YOLO model file from the specified directory.
+    Renders a page as a grayscale image for OCR.
+
     Args:
-        yolo_dir (str): Directory where YOLO model files are stored.
+        page (fitz.Page): The page to render.
+        dpi (float | None): Render resolution, chosen with `choose_ocr_dpi` by default.
+        binarize (str | None): Binarization method, see `binarize_image`.
+        pool (BufferPool | None): Pool the page array is taken from.
+
     Returns:
-        Path: Path to the latest YOLO model file.
-    Raises:
-        FileNotFoundError: If no YOLO model files are found in the specified directory.
+        tuple: `(np.ndarray, zoom)`, the page as a writable (height, width)
+        array owning its memory, so it outlives the pixmap.
     """
-    yolo_files = sorted(
-        glob(str(Path(yolo_dir) / "*.pt")),
-        key=lambda f: os.path.getmtime(f),
-        reverse=True,
-    )
-    if not yolo_files:
-        raise FileNotFoundError(f"YOLO model file not found at {yolo_dir}/")
-    return Path(yolo_files[0])
-
-def page_to_image(page, dpi=300):
+    if dpi is None:
+        dpi = choose_ocr_dpi(page)
     zoom = dpi / 72
-    matrix = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=matrix)
-    return Image.frombytes("RGB", [pix.width, pix.height], pix.samples), zoom
+    pix = render_page_gray(page, zoom)
+    gray = pixmap_to_array(pix)
+    out = pool.acquire(gray.shape) if pool is not None else None
+    if binarize:
+        return binarize_image(gray, binarize, out), zoom
+    if out is None:
+        return gray.copy(), zoom
+    np.copyto(out, gray)
+    return out, zoom
 
 def clean_text(text):
     text = re.sub(r'\n\s*\n+', '\n\n', text)
@@ -52,92 +77,120 @@ def clean_text(text):
     text = text.replace('\t', ' ')
     return text.strip()
 
-def mask_image_with_yolo(image, model):
+def fill_white(image, bbox, offset=(0, 0)):
+    """
+    Paints a box white in place, borders included.
 
-    img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-    results = model.predict(img_cv, verbose=False)
+    Args:
+        image (np.ndarray): Grayscale image, modified in place.
+        bbox (tuple): Box as (x1, y1, x2, y2) in pixels.
+        offset (tuple): (x, y) of the image origin in the coordinates of `bbox`.
+    """
+    x1, y1, x2, y2 = map(int, bbox)
+    x1, x2 = x1 - offset[0], x2 - offset[0]
+    y1, y2 = y1 - offset[1], y2 - offset[1]
+    if x2 < 0 or y2 < 0:
+        return
+    image[max(y1, 0):y2 + 1, max(x1, 0):x2 + 1] = 255
 
-    target_labels = list(model.names.values())
-    bounding_boxes = {label: [] for label in target_labels}
-    label_masking = ["Non-Text"]  # Labels to mask
-    masked_cv = img_cv.copy()
 
-    for r in results:
-        boxes = r.boxes.xyxy.cpu().numpy()
-        classes = r.boxes.cls.cpu().numpy()
+def mask_image_with_yolo(image, model, bounding_boxes=None):
+    """
+    Paints the "Non-Text" objects detected by YOLO white, in place.
 
-        for box, cls in zip(boxes, classes):
-            x1, y1, x2, y2 = map(int, box[:4])
-            label_id = int(cls)
-            label_name = model.names[label_id]
-            bounding_boxes[label_name].append((x1, y1, x2, y2))
+    Args:
+        image (np.ndarray): Grayscale page, see `page_to_image`.
+        model (YOLO): Loaded YOLO model, only used if `bounding_boxes` is None.
+        bounding_boxes (dict, optional): YOLO boxes per label in image pixels.
 
-            if label_name in label_masking:
-                cv2.rectangle(masked_cv, (x1, y1), (x2, y2), (255, 255, 255), -1)  # Draw rectangle with red border and thickness 2
+    Returns:
+        tuple: `(image, bounding_boxes)`, the same array now masked.
+    """
+    if bounding_boxes is None:
+        # Detection was not batched upstream, run it for this page only
+        bounding_boxes = detect_batch(model, [cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)])[0]
 
-    masked_pil = Image.fromarray(cv2.cvtColor(masked_cv, cv2.COLOR_BGR2RGB))
+    label_masking = ["Non-Text"]  # Labels to mask
 
-    return masked_pil, bounding_boxes
+    for label_name in label_masking:
+        for bbox in bounding_boxes.get(label_name, []):
+            fill_white(image, bbox)  # Fill the excluded object with white
 
+    return image, bounding_boxes
 
-def extract_text_from_image(image):
-    data = pytesseract.image_to_data(image, config="--oem 3 --psm 4", lang="eng+id", output_type=pytesseract.Output.DICT)
-    confidences = [conf for conf in data['conf'] if conf != -1]
-    avg_confidence = round(sum(confidences) / len(confidences), 2) if confidences else 0.0
 
-    text = " ".join([
-        data['text'][i]
-        for i in range(len(data['text']))
-        if data['conf'][i] != -1 and data['text'][i].strip() != ""
-    ])
+def crop_region(image, bbox, other_bboxes=(), padding=REGION_PADDING):
+    """
+    Crops a padded region out of a page image for OCR.
 
-    return text, avg_confidence
+    Parts of other regions that fall inside the padded crop are painted white,
+    so every region is only read once. Only then the crop is copied, otherwise
+    it is a view of `image`.
 
+    Args:
+        image (np.ndarray): The masked grayscale page.
+        bbox (tuple): Region as (x1, y1, x2, y2) in image pixels.
+        other_bboxes (Iterable[tuple]): Other regions to blank out inside the crop.
+        padding (int): Margin in pixels kept around the region.
 
-def extract_pdf_single_page(doc, base_name, model_yolo, page_number):
+    Returns:
+        np.ndarray: The cropped region.
     """
-    Extract text and tables from a single PDF page using a combination of YOLO object detection and OCR.
-    This function processes a PDF page by:
-    1. Converting the page to an image
-    2. Using YOLO to detect and mask non-text elements
-    3. Applying redactions to exclude non-text objects from the PDF
-    4. Identifying text regions and tables
-    5. Extracting content from each region in order (top to bottom)
-    Parameters
-    ----------
-    doc : fitz.Document
-        The PyMuPDF document object containing the PDF
-    base_name : str
-        Base name of the PDF file (used for logging)
-    model_yolo : object
-        Loaded YOLO model for text/non-text detection
-    page_number : int
-        The page number to process (0-indexed)
-    Returns
-    -------
-    tuple
-        A tuple containing:
-        - combined_content (str): The extracted text and table content
-        - confidence (float): The OCR confidence score (average if multiple text regions)
-    Notes
-    -----
-    The function sorts detected elements by their vertical position (y-coordinate)
-    and processes them sequentially. Tables are extracted using PyMuPDF's table detection,
-    while text is extracted using OCR after appropriate masking.
+    height, width = image.shape[:2]
+    x1, y1, x2, y2 = map(int, bbox)
+    left, top = max(x1 - padding, 0), max(y1 - padding, 0)
+    right, bottom = min(x2 + padding, width), min(y2 + padding, height)
+    crop = image[top:bottom, left:right]
+
+    overlapping = [
+        other_bbox
+        for other_bbox in other_bboxes
+        if not (
+            other_bbox[0] >= right or other_bbox[2] <= left
+            or other_bbox[1] >= bottom or other_bbox[3] <= top
+        )
+    ]
+    if overlapping:
+        crop = crop.copy()
+        for other_bbox in overlapping:
+            fill_white(crop, other_bbox, offset=(left, top))
+
+    return crop
+
+
+def ink_bounding_box(image, threshold=INK_THRESHOLD):
     """
+    Finds the bounding box of the dark pixels of an image.
 
-    page = doc.load_page(page_number)
-    
-    img, zoom = page_to_image(page)
-    draw = ImageDraw.Draw(img)
+    Args:
+        image (np.ndarray): Grayscale image to inspect.
+        threshold (int): Gray values below this are considered ink.
+
+    Returns:
+        tuple | None: (x1, y1, x2, y2) of the ink, or None for a blank image.
+    """
+    ink = image < threshold
+    rows = np.flatnonzero(ink.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(ink.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
 
-    # Masking gambar
-    mask_image, bounding_boxes = mask_image_with_yolo(img, model_yolo)
-    # mask_image.save("temp_masked_image.png")
-    draw = ImageDraw.Draw(mask_image)
-    
 
-    # Masking PDF dari exclude object
+def extract_text_from_image(image):
+    # Contiguous arrays are wrapped without a copy
+    return get_ocr_backend().extract(Image.fromarray(image))
+
+
+def redact_non_text(page, bounding_boxes, zoom):
+    """
+    Redacts the "Non-Text" objects detected by YOLO from the (in-memory) page.
+
+    Args:
+        page (fitz.Page): The page to redact.
+        bounding_boxes (dict): YOLO boxes per label, in image pixels.
+        zoom (float): Zoom factor of the image the boxes were detected on.
+    """
     for label, bboxes in bounding_boxes.items():
         if label == "Non-Text":
             for bbox in bboxes:
@@ -146,6 +199,20 @@ def extract_pdf_single_page(doc, base_name, model_yolo, page_number):
                 page.add_redact_annot(rect, fill=(1, 1, 1))
     page.apply_redactions()
 
+
+def collect_page_regions(page, bounding_boxes, zoom):
+    """
+    Collects the text regions detected by YOLO and the tables found by PyMuPDF.
+
+    Args:
+        page (fitz.Page): The (redacted) page.
+        bounding_boxes (dict): YOLO boxes per label, in image pixels.
+        zoom (float): Zoom factor of the image the boxes were detected on.
+
+    Returns:
+        dict: Region label ("Text1", "Table", ...) mapped to its image pixel
+        "bbox" and table "objects", sorted from top to bottom.
+    """
     # Menyimpan jumlah label yang lebih dari 1
     label_count = {}
     # Hanya menyimpan bounding box untuk label yang diinginkan
@@ -208,87 +275,166 @@ def extract_pdf_single_page(doc, base_name, model_yolo, page_number):
 
     
     # Urutkan berdasarkan y1 (bbox[1])
-    sorted_combined = dict(
+    return dict(
         sorted(combined_data.items(), key=lambda item: item[1]["bbox"][1])
     )
 
-    # print(f"\n Gabungan bounding box:", sorted_combined)
 
-    # Ekstraksi teks dari gambar yang sudah dimask
-    # print(f"Jumlah label yang ditemukan: {len(sorted_combined)}")
+def format_table(label, table):
+    """Formats the rows of a PyMuPDF table, or returns an empty string if it has no data."""
+    rows = table.extract()
+    if not rows:  # Cek apakah ada data hasil ekstraksi
+        return ""
+    content = f"\n\n{label}:\n\n"
+    for row in rows:
+        content += f"{row}\n\n"
+    return content
 
-    if sorted_combined:
-        combined_content = ""
-        confidences = []
 
-        working_image1 = mask_image.copy()
-        draw1 = ImageDraw.Draw(working_image1)
+def format_region_tables(sorted_combined):
+    """Formats the tables of `collect_page_regions` output, keyed by region label."""
+    return {
+        label: "".join(format_table(label, table) for table in info["objects"])
+        for label, info in sorted_combined.items()
+        if label.startswith("Table")
+    }
+
+
+def extract_pdf_single_page(doc, base_name, model_yolo, page_number, page_image=None, bounding_boxes=None, mupdf_lock=None):
+    """
+    Extract text and tables from a single PDF page using a combination of YOLO object detection and OCR.
+    This function processes a PDF page by:
+    1. Converting the page to an image
+    2. Using YOLO to detect and mask non-text elements
+    3. Applying redactions to exclude non-text objects from the PDF
+    4. Identifying text regions and tables
+    5. Extracting content from each region in order (top to bottom)
+    Parameters
+    ----------
+    doc : fitz.Document
+        The PyMuPDF document object containing the PDF
+    base_name : str
+        Base name of the PDF file (used for logging)
+    model_yolo : object
+        Loaded YOLO model for text/non-text detection
+    page_number : int
+        The page number to process (0-indexed)
+    page_image : tuple, optional
+        The already rendered grayscale page as `(np.ndarray, zoom)`, rendered here
+        if omitted. The array is masked in place.
+    bounding_boxes : dict, optional
+        YOLO boxes per label for `page_image`, detected here if omitted
+    mupdf_lock : threading.Lock, optional
+        Held around every MuPDF call when the document is shared between threads
+    Returns
+    -------
+    tuple
+        A tuple containing:
+        - combined_content (str): The extracted text and table content
+        - confidence (float): The OCR confidence score (average if multiple text regions)
+    Notes
+    -----
+    The function sorts detected elements by their vertical position (y-coordinate)
+    and processes them sequentially. Tables are extracted using PyMuPDF's table detection,
+    while text is extracted using OCR after appropriate masking.
+    """
+
+    mupdf_lock = mupdf_lock or nullcontext()
 
-        for label, info in sorted_combined.items():
-            bbox = info["bbox"]
-            x1, y1, x2, y2 = map(int, bbox)
-            draw1.rectangle([x1, y1, x2, y2], fill="white", outline="red")
+    with mupdf_lock:
+        page = doc.load_page(page_number)
+        img, zoom = page_image if page_image is not None else page_to_image(page)
 
+    # Masking gambar (in place, tidak ada salinan halaman penuh)
+    mask_image, bounding_boxes = mask_image_with_yolo(img, model_yolo, bounding_boxes)
+    # mask_image.save("temp_masked_image.png")
 
-        for idx, (label, info) in enumerate(sorted_combined.items()):
-            bbox = info["bbox"]
-            
+    # Masking PDF dari exclude object, halaman dilepas selagi lock masih dipegang
+    with mupdf_lock:
+        regions, table_contents = prepare_ocr_page(page, bounding_boxes, zoom)
+        del page
 
-            if label.startswith("Text"):
-                # Draw bounding box for the current text label
-        
-                working_image2 = mask_image.copy()
-                draw2 = ImageDraw.Draw(working_image2)
+    return ocr_page_regions(mask_image, regions, table_contents)
+
+
+def prepare_ocr_page(page, bounding_boxes, zoom):
+    """
+    Does the MuPDF part of the OCR route: redacts the "Non-Text" objects,
+    collects the regions and formats the tables of the page.
+
+    Args:
+        page (fitz.Page): The page to read.
+        bounding_boxes (dict): YOLO boxes per label, in image pixels.
+        zoom (float): Zoom factor of the image the boxes were detected on.
 
-                # Masking seluruh objek kecuali footer atau header saat ini
-                for other_label, other_info in sorted_combined.items():
-                    if other_label != label:
-                        other_bbox = other_info["bbox"]
-                        if isinstance(other_bbox, (list, tuple)) and len(other_bbox) == 4:
-                            x1, y1, x2, y2 = map(int, other_bbox)
-                            draw2.rectangle([x1, y1, x2, y2], fill="white", outline="red")
+    Returns:
+        tuple: `(regions, table_contents)`, the image pixel bbox of every
+        region label from top to bottom, and the text of every table region.
+        Both are plain data, so the OCR does not need the page.
+    """
+    redact_non_text(page, bounding_boxes, zoom)
+    sorted_combined = collect_page_regions(page, bounding_boxes, zoom)
+    table_contents = format_region_tables(sorted_combined)
+    regions = {label: info["bbox"] for label, info in sorted_combined.items()}
+    return regions, table_contents
 
-                # Simpan gambar hasil masking untuk label saat ini
-                # x1, y1, x2, y2 = map(int, bbox)
-                # draw.rectangle([x1, y1, x2, y2], outline="blue", width=2)
 
-                # Display the image with bounding box
-                # working_image.show()
+def ocr_page_regions(mask_image, regions, table_contents):
+    """
+    OCRs the regions of a masked page image, see `prepare_ocr_page`.
+
+    Args:
+        mask_image (np.ndarray): Grayscale page with the "Non-Text" objects
+            painted white, modified in place.
+        regions (dict): Region label mapped to its image pixel bbox.
+        table_contents (dict): Formatted text of every table region.
+
+    Returns:
+        tuple: (combined_content, confidence)
+    """
+    # print(f"\n Gabungan bounding box:", regions)
+
+    # Ekstraksi teks dari gambar yang sudah dimask
+    # print(f"Jumlah label yang ditemukan: {len(regions)}")
+
+    if regions:
+        combined_content = ""
+        confidences = []
 
-                # Save the image with bounding box
-                # working_image.save(f"output_text_bounding_box_{label}_{idx}.png")
+        for label, bbox in regions.items():
+            if label.startswith("Text"):
+                # OCR hanya pada crop dari bounding box teks saat ini
+                other_bboxes = [
+                    other_bbox
+                    for other_label, other_bbox in regions.items()
+                    if other_label != label
+                ]
+                working_image2 = crop_region(mask_image, bbox, other_bboxes)
 
                 raw_text, confidence = extract_text_from_image(working_image2)
                 confidences.append(confidence)
                 combined_content += f"\n\n{raw_text}\n\n"
 
-                del working_image2, draw2
+                del working_image2
 
             elif label.startswith("Table"):
-                # Masking seluruh objek kecuali tabel saat ini
-                for bbox, table in zip(info["bbox"], info["objects"]):
-                    rows = table.extract()
-                    if rows:  # Cek apakah ada data hasil ekstraksi
-                        combined_content += f"\n\n{label}:\n\n"
-                        for row in rows:
-                            combined_content += f"{row}\n\n"
-                    else:
-                        # yield logging_process(
-                        #     "warning",
-                        #     f"⚠️ Table in File {base_name} on page {page_number + 1} {label} has no data to extract."
-                        # )
-                        continue
+                combined_content += table_contents[label]
         
-        # working_image1.save(f"temp_masked.png")
-        raw_text, confidence = extract_text_from_image(working_image1)
-        combined_content += f"\n\n{raw_text}\n\n"
+        # Semua region sudah dibaca, jadi boleh diputihkan langsung di buffer halaman
+        for bbox in regions.values():
+            fill_white(mask_image, bbox)
+
+        # Teks sisa di luar semua region, hanya jika masih ada piksel tinta
+        residual_bbox = ink_bounding_box(mask_image)
+        if residual_bbox is not None:
+            raw_text, confidence = extract_text_from_image(
+                crop_region(mask_image, residual_bbox)
+            )
+            combined_content += f"\n\n{raw_text}\n\n"
 
         combined_content = clean_text(combined_content)
         avg_confidence = round(sum(confidences) / len(confidences), 2) if confidences else 0.0
 
-        del working_image1, draw1, table_bounding_box, text_bounding_box, combined_data
-        gc.collect()
-
         return combined_content, avg_confidence
 
     else:
@@ -302,56 +448,381 @@ def extract_pdf_single_page(doc, base_name, model_yolo, page_number):
         return combined_content, confidence
 
 
-def process_pdf_pymu_tesseract(pdf_path, folder_output_path, overwrite=True):
-    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-    output_path = Path(folder_output_path) / f"{base_name}.json"
-    # start_ram = psutil.Process().memory_info().rss / 1024**2
-    model = YOLO(get_latest_yolo_model_path())
+def extract_native_page(page, bounding_boxes, zoom, mupdf_lock=None):
+    """
+    Extract text and tables of a born-digital page straight from its text layer.
 
-    if not overwrite and check_json_file_exists(output_path):
-        yield logging_process(
-            "info",
-            f"[SKIP] JSON result already exists for {base_name}.pdf, skipping.",
-        )
-        return
-    
-    doc = fitz.open(pdf_path)
-    output_data = {"content": [], "total_page": doc.page_count}
-    os.makedirs(folder_output_path, exist_ok=True)
-    total_times = 0
+    The "Non-Text" objects are redacted like in the OCR route, text regions
+    are read with clip rectangles in the same top to bottom order, and text
+    outside of all regions is appended at the end.
+
+    Args:
+        page (fitz.Page): The page to read.
+        bounding_boxes (dict): YOLO boxes per label, in image pixels.
+        zoom (float): Zoom factor of the image the boxes were detected on.
+        mupdf_lock (threading.Lock, optional): Held while reading the page when
+            the document is shared between threads.
+
+    Returns:
+        tuple: (combined_content, confidence)
+    """
+    with mupdf_lock or nullcontext():
+        return _extract_native_page(page, bounding_boxes, zoom)
+
+
+def _extract_native_page(page, bounding_boxes, zoom):
+    redact_non_text(page, bounding_boxes, zoom)
+    sorted_combined = collect_page_regions(page, bounding_boxes, zoom)
+
+    combined_content = ""
+    region_rects = []
+    for label, info in sorted_combined.items():
+        x1, y1, x2, y2 = info["bbox"]
+        rect = fitz.Rect(x1 / zoom, y1 / zoom, x2 / zoom, y2 / zoom)
+        region_rects.append(rect)
+
+        if label.startswith("Text"):
+            raw_text = page.get_text("text", clip=rect, sort=True)
+            combined_content += f"\n\n{raw_text}\n\n"
+        elif label.startswith("Table"):
+            for table in info["objects"]:
+                combined_content += format_table(label, table)
+
+    # Teks sisa di luar semua region
+    for x1, y1, x2, y2, raw_text, _, block_type in page.get_text("blocks", sort=True):
+        center = fitz.Point((x1 + x2) / 2, (y1 + y2) / 2)
+        if block_type == 0 and not any(center in rect for rect in region_rects):
+            combined_content += f"\n\n{raw_text}\n\n"
 
-    for page_number in range(len(doc)):
+    return clean_text(combined_content), NATIVE_TEXT_CONFIDENCE
+
+
+def render_page_for_detection(page, dpi=None, native_text=True, binarize=OCR_BINARIZE, pool=None):
+    """
+    Renders a page for the detection stage and decides how its text is read.
+
+    Digital pages (see `classify_page`) are only rendered at the detection
+    DPI for YOLO, their text comes from the PDF itself. Other pages also get
+    a grayscale render at their OCR DPI (see `page_to_image`); the RGB render
+    at the lower detection DPI is only used by YOLO. The OCR array is taken
+    from `pool` if given, and should be released to it once the page is done.
+
+    Returns:
+        tuple: `(payload, bgr_image)`, the payload holds the "image" for OCR
+        (None for the native route), its "zoom", the "detect_zoom" of the BGR
+        image and the page "analysis".
+    """
+    analysis = classify_page(page)
+    detect_zoom = choose_detection_dpi(page) / 72
+    if native_text and analysis["page_type"] == PAGE_DIGITAL:
+        payload = {"image": None, "zoom": detect_zoom, "detect_zoom": detect_zoom, "analysis": analysis}
+        return payload, pixmap_to_bgr(render_page(page, detect_zoom))
+
+    image, zoom = page_to_image(page, dpi, binarize, pool)
+    detect_zoom = min(detect_zoom, zoom)
+    payload = {"image": image, "zoom": zoom, "detect_zoom": detect_zoom, "analysis": analysis}
+    return payload, pixmap_to_bgr(render_page(page, detect_zoom))
+
+
+def page_bounding_boxes(payload, bounding_boxes):
+    """Scales the YOLO boxes of a page from its detection image to its "zoom"."""
+    return scale_bounding_boxes(bounding_boxes, payload["zoom"] / payload["detect_zoom"])
+
+
+def iter_page_records(doc, base_name, model, batch_size=DEFAULT_BATCH_SIZE, native_text=True, page_numbers=None, binarize=OCR_BINARIZE):
+    """
+    Extracts pages of an opened document one by one.
+
+    Yields a status dict before each page, then `(page_number, record)` with
+    the page entry of the output JSON once the page is done.
+    """
+    # Page buffers are recycled between pages, collections only run under memory pressure
+    pool = BufferPool(max_idle=batch_size)
+    memory_guard = MemoryGuard()
+
+    # Pages are rendered and detected `batch_size` at a time, then OCR'd one by one
+    detected_pages = iter_page_detections(
+        doc,
+        model,
+        lambda page: render_page_for_detection(
+            page, native_text=native_text, binarize=binarize, pool=pool
+        ),
+        batch_size=batch_size,
+        page_numbers=page_numbers,
+    )
+    for page, payload, bounding_boxes, detect_secs in detected_pages:
+        page_number = page.number
         start_time = time.time()
+        bounding_boxes = page_bounding_boxes(payload, bounding_boxes)
 
         yield logging_process(
             "info",
             f"🚀 Starting process for file: {base_name}.pdf\n📄 Processing page {page_number + 1}/{len(doc)} pages"
         )
-        content, confidence = extract_pdf_single_page(doc, base_name, model, page_number)
-
-        duration = round(time.time() - start_time, 2)
-
-        output_data["content"].append({
+        if payload["image"] is None:
+            route = "native"
+            content, confidence = extract_native_page(page, bounding_boxes, payload["zoom"])
+        else:
+            route = "ocr"
+            mask_image, _ = mask_image_with_yolo(payload["image"], model, bounding_boxes)
+            content, confidence = ocr_page_regions(
+                mask_image, *prepare_ocr_page(page, bounding_boxes, payload["zoom"])
+            )
+            pool.release(payload.pop("image"))
+
+        duration = round(time.time() - start_time + detect_secs, 2)
+
+        yield page_number, {
             "page": page_number + 1,
             "content": content,
             "confidence": confidence,
             "duration": duration,
-        })
-
-        total_times += duration
+            "route": route,
+            "page_type": payload["analysis"]["page_type"],
+        }
 
         # print(f"📄 Halaman {page_number + 1} | Confidence: {confidence}")
         # print(f"🕒 Durasi: {time.time() - start_time:.2f} detik | RAM: {start_ram:+.2f} MB")
-        del content, confidence
-        gc.collect()
-    
-        with open(output_path, "w+", encoding="utf-8") as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
-    
-    output_data["total_time"] = round(total_times, 2)
+        memory_guard.check()
+
+
+def iter_pipelined_page_records(
+    doc, base_name, model, batch_size=DEFAULT_BATCH_SIZE, native_text=True,
+    page_numbers=None, ocr_workers=DEFAULT_OCR_WORKERS, queue_depth=DEFAULT_QUEUE_DEPTH,
+    stats=None, binarize=OCR_BINARIZE,
+):
+    """
+    Like `iter_page_records`, but rendering and detection of the next pages
+    overlap with the OCR of the current one (see `PagePipeline`).
 
-    with open(output_path, "w+", encoding="utf-8") as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    If a `stats` dict is passed, it receives the per-stage busy time and
+    queue depths of the pipeline once all pages are done.
+    """
+    pool = BufferPool(max_idle=queue_depth)
+    memory_guard = MemoryGuard()
+
+    def prepare(page, payload, bounding_boxes):
+        # MuPDF thread: everything that reads the page, see PagePipeline
+        bounding_boxes = page_bounding_boxes(payload, bounding_boxes)
+        if payload["image"] is None:
+            return bounding_boxes, extract_native_page(page, bounding_boxes, payload["zoom"])
+        return bounding_boxes, prepare_ocr_page(page, bounding_boxes, payload["zoom"])
+
+    def extract(payload, prepared):
+        bounding_boxes, page_data = prepared
+        if payload["image"] is None:
+            return "native", page_data
+        try:
+            mask_image, _ = mask_image_with_yolo(payload["image"], model, bounding_boxes)
+            return "ocr", ocr_page_regions(mask_image, *page_data)
+        finally:
+            pool.release(payload.pop("image"))
+
+    pipeline = PagePipeline(
+        doc,
+        model,
+        lambda page: render_page_for_detection(
+            page, native_text=native_text, binarize=binarize, pool=pool
+        ),
+        prepare,
+        extract,
+        batch_size=batch_size,
+        ocr_workers=ocr_workers,
+        queue_depth=queue_depth,
+    )
+    for page_number, payload, (route, (content, confidence)), duration in pipeline.run(page_numbers):
+        yield page_number, {
+            "page": page_number + 1,
+            "content": content,
+            "confidence": confidence,
+            "duration": round(duration, 2),
+            "route": route,
+            "page_type": payload["analysis"]["page_type"],
+        }
+        memory_guard.check()
+
+    if stats is not None:
+        stats.update(pipeline.stats())
+
+
+def _process_page_range(pdf_path, page_numbers, batch_size, native_text, binarize):
+    """Worker task: extracts the pages `page_numbers` on its own document handle."""
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    model = get_yolo_model()
+    with fitz.open(pdf_path) as doc:
+        return [
+            item[1]
+            for item in iter_page_records(
+                doc, base_name, model, batch_size, native_text, page_numbers, binarize
+            )
+            if not isinstance(item, dict)
+        ]
+
+
+def iter_sharded_page_records(pdf_path, page_count, page_workers, shard_size=None, batch_size=DEFAULT_BATCH_SIZE, native_text=True, page_numbers=None, binarize=OCR_BINARIZE):
+    """
+    Extracts the pages of a document in page-range shards on a process pool.
+
+    Every worker opens its own handle on the file. Shards finish in any order,
+    but records are yielded in page order as soon as all previous pages are done.
+
+    Args:
+        page_numbers (Iterable[int] | None): 0-based pages to extract, all by default.
+        binarize (str | None): Binarization of the OCR renders, see `page_to_image`.
+
+    Yields:
+        tuple: `(page_number, record)` like `iter_page_records`.
+    """
+    if page_numbers is None:
+        page_numbers = range(page_count)
+    page_numbers = list(page_numbers)
+    if shard_size is None:
+        # A few shards per worker keeps the workers busy until the end
+        shard_size = max(1, min(MAX_SHARD_SIZE, math.ceil(len(page_numbers) / (page_workers * 4))))
+
+    context = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=page_workers, mp_context=context)
+    try:
+        futures = {
+            pool.submit(
+                _process_page_range, pdf_path, page_numbers[start:start + shard_size],
+                batch_size, native_text, binarize,
+            ): start
+            for start in range(0, len(page_numbers), shard_size)
+        }
+        done_shards = {}
+        next_shard = 0
+        for future in as_completed(futures):
+            done_shards[futures[future]] = future.result()
+            while next_shard in done_shards:
+                for record in done_shards.pop(next_shard):
+                    yield record["page"] - 1, record
+                next_shard += shard_size
+    finally:
+        # When the caller stops early or a shard fails, the queued shards are
+        # dropped instead of waited for
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def process_pdf_pymu_tesseract(
+    pdf_path,
+    folder_output_path,
+    overwrite=True,
+    batch_size=DEFAULT_BATCH_SIZE,
+    native_text=True,
+    page_workers=1,
+    shard_size=None,
+    pipelined=False,
+    ocr_workers=DEFAULT_OCR_WORKERS,
+    queue_depth=DEFAULT_QUEUE_DEPTH,
+    fsync=False,
+    jsonl_only=False,
+    use_cache=True,
+    binarize=OCR_BINARIZE,
+):
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    output_path = Path(folder_output_path) / f"{base_name}.json"
+    # start_ram = psutil.Process().memory_info().rss / 1024**2
+
+    if not overwrite and check_json_file_exists(output_path):
+        yield logging_process(
+            "info",
+            f"[SKIP] JSON result already exists for {base_name}.pdf, skipping.",
+        )
+        return
+
+    os.makedirs(folder_output_path, exist_ok=True)
+    # Pages are appended to a JSONL sidecar, compacted into the JSON at the end
+    with fitz.open(pdf_path) as doc, ResultWriter(
+        output_path, doc.page_count, fsync=fsync, jsonl_only=jsonl_only
+    ) as writer:
+        # Without overwrite, an interrupted run continues after its last finished page
+        done_pages = [] if overwrite else load_completed_pages(output_path, doc.page_count)
+        writer.open(done_pages)
+        total_times = sum(record["duration"] for record in done_pages)
+        start_page = len(done_pages)
+        if done_pages:
+            yield logging_process(
+                "info",
+                f"♻️ Resuming {base_name}.pdf at page {start_page + 1}/{doc.page_count}"
+            )
+
+        # Pages of identical PDFs extracted before are taken from the cache
+        cache = get_extraction_cache() if use_cache else None
+        cached = {}
+        if cache is not None:
+            doc_hash = file_sha256(pdf_path)
+            cache_config = config_hash(
+                METHOD_PYMU_TESSERACT,
+                yolo_weights=get_yolo_weights_hash(),
+                native_text=native_text,
+                ocr_backend=get_ocr_backend().name,
+                ocr_lang=OCR_LANG,
+                ocr_oem=OCR_OEM,
+                ocr_psm=OCR_PSM,
+                binarize=binarize,
+            )
+            cached = cache.get_pages(doc_hash, cache_config, range(start_page + 1, doc.page_count + 1))
+            if cached:
+                yield logging_process(
+                    "info",
+                    f"📦 {len(cached)} pages of {base_name}.pdf found in the extraction cache"
+                )
+        page_numbers = [n for n in range(start_page, doc.page_count) if n + 1 not in cached]
+
+        # Only set when the pipelined path is the one that runs
+        pipeline_stats = None
+        if page_workers > 1 and len(page_numbers) > 1:
+            # Large documents are split into page ranges processed in parallel
+            yield logging_process(
+                "info",
+                f"🚀 Starting process for file: {base_name}.pdf\n📄 Processing {doc.page_count} pages with {page_workers} workers"
+            )
+            page_records = iter_sharded_page_records(
+                pdf_path, doc.page_count, page_workers, shard_size, batch_size, native_text,
+                page_numbers=page_numbers, binarize=binarize,
+            )
+        elif pipelined:
+            yield logging_process(
+                "info",
+                f"🚀 Starting process for file: {base_name}.pdf\n📄 Processing {doc.page_count} pages"
+            )
+            pipeline_stats = {}
+            page_records = iter_pipelined_page_records(
+                doc, base_name, get_yolo_model(), batch_size, native_text, page_numbers,
+                ocr_workers=ocr_workers, queue_depth=queue_depth, stats=pipeline_stats,
+                binarize=binarize,
+            )
+        else:
+            page_records = iter_page_records(
+                doc, base_name, get_yolo_model(), batch_size, native_text, page_numbers, binarize
+            )
+
+        # When processing stops early, leaving the block keeps the finished pages in the sidecar
+        for item in iter_with_cached_pages(page_records, cached):
+            if isinstance(item, dict):
+                yield item
+                continue
+
+            page_number, record, from_cache = item
+            if from_cache:
+                record = {**record, "duration": 0.0, "cached": True}
+            elif cache is not None:
+                cache.put_page(doc_hash, cache_config, page_number + 1, record)
+            writer.append(record)
+            total_times += record["duration"]
+
+            if page_workers > 1 or pipelined:
+                yield logging_process(
+                    "info",
+                    f"📄 Processed page {page_number + 1}/{doc.page_count} of {base_name}.pdf"
+                )
+
+        summary = {"total_time": round(total_times, 2)}
+        if pipeline_stats is not None:
+            summary["pipeline_stats"] = pipeline_stats
+
+        writer.finalize(summary)
 
     yield logging_process("success", f"Finished processing PDF: {base_name}")
         
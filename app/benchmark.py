@@ -0,0 +1,209 @@
+"""Small benchmarks for the extraction pipelines.
+
+Run from the repository root, e.g.:
+
+    python app/benchmark.py yolo-batch app/temp/pdf/sample.pdf --batch-sizes 1 4 8
+    python app/benchmark.py page-memory app/temp/pdf/sample.pdf --max-pages 10
+"""
+
+import argparse
+import gc
+import threading
+import time
+from pathlib import Path
+
+import psutil
+import pymupdf
+
+from detection import detect_batch, iter_page_detections
+from model_registry import get_yolo_model
+from page_render import BINARIZE_ADAPTIVE, BINARIZE_OTSU, pixmap_to_bgr, render_page
+
+
+def benchmark_yolo_batch(pdf_path, batch_sizes=(1, 4, 8), zoom=3, max_pages=None):
+    """
+    Measures render + detection throughput of the YOLO stage per batch size.
+
+    Args:
+        pdf_path (str | Path): PDF used for the benchmark.
+        batch_sizes (Iterable[int]): Batch sizes to compare.
+        zoom (float): Zoom factor used to rasterize the pages.
+        max_pages (int | None): Only use the first `max_pages` pages.
+
+    Returns:
+        list[dict]: Pages, seconds and pages per second for each batch size.
+    """
+    model = get_yolo_model()
+
+    def render(page):
+        return None, pixmap_to_bgr(render_page(page, zoom))
+
+    results = []
+    with pymupdf.open(pdf_path) as doc:
+        page_numbers = range(min(doc.page_count, max_pages or doc.page_count))
+
+        # Warm up the model so the first measured batch does not pay for it
+        for _ in iter_page_detections(doc, model, render, batch_size=1, page_numbers=[0]):
+            pass
+
+        for batch_size in batch_sizes:
+            start_time = time.perf_counter()
+            for _ in iter_page_detections(
+                doc, model, render, batch_size=batch_size, page_numbers=page_numbers
+            ):
+                pass
+            seconds = time.perf_counter() - start_time
+            results.append({
+                "batch_size": batch_size,
+                "pages": len(page_numbers),
+                "seconds": round(seconds, 2),
+                "pages_per_second": round(len(page_numbers) / seconds, 2),
+            })
+
+    return results
+
+
+class PeakRSS:
+    """
+    Samples the resident set size of a process in a background thread while
+    the `with` block runs, keeping the highest value in `peak`.
+
+    Args:
+        process (psutil.Process): The sampled process.
+        interval (float): Seconds between two samples.
+    """
+
+    def __init__(self, process: psutil.Process, interval: float = 0.005):
+        self.process = process
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while True:
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self.peak = self.process.memory_info().rss
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+
+def benchmark_page_memory(pdf_path, dpi=None, binarize=None, max_pages=None):
+    """
+    Measures the peak RSS of the PyMuPDF + Tesseract OCR route per page.
+
+    Every page goes through render, detection and `extract_pdf_single_page`,
+    also born-digital pages, so all pages exercise the image buffers.
+
+    Args:
+        pdf_path (str | Path): PDF used for the benchmark.
+        dpi (float | None): OCR render DPI, chosen per page by default.
+        binarize (str | None): Binarization of the OCR render.
+        max_pages (int | None): Only use the first `max_pages` pages.
+
+    Returns:
+        list[dict]: Per page, the OCR image size in megapixels, the RSS before
+        the page and its peak while the page was processed, in MB.
+    """
+    from Pymu_Tesseract_Finetuned import (
+        extract_pdf_single_page,
+        page_bounding_boxes,
+        render_page_for_detection,
+    )
+
+    model = get_yolo_model()
+    process = psutil.Process()
+    base_name = Path(pdf_path).stem
+
+    def run_page(doc, page_number):
+        page = doc.load_page(page_number)
+        payload, image = render_page_for_detection(
+            page, dpi=dpi, native_text=False, binarize=binarize
+        )
+        bounding_boxes = detect_batch(model, [image])[0]
+        del image
+        # From the page size, so the script also runs against the older PIL-based route
+        pixels = page.rect.width * payload["zoom"] * page.rect.height * payload["zoom"]
+        extract_pdf_single_page(
+            doc, base_name, model, page_number,
+            (payload["image"], payload["zoom"]), page_bounding_boxes(payload, bounding_boxes),
+        )
+        return pixels
+
+    # Warm up the model and the OCR engine so their setup is not measured. The
+    # page is redacted while extracted, so this uses a handle of its own.
+    with pymupdf.open(pdf_path) as warmup_doc:
+        run_page(warmup_doc, 0)
+
+    results = []
+    with pymupdf.open(pdf_path) as doc:
+        page_count = min(doc.page_count, max_pages or doc.page_count)
+
+        for page_number in range(page_count):
+            gc.collect()
+            baseline = process.memory_info().rss
+            with PeakRSS(process) as rss:
+                pixels = run_page(doc, page_number)
+            results.append({
+                "page": page_number + 1,
+                "megapixels": round(pixels / 1e6, 1),
+                "baseline_mb": round(baseline / 1024**2, 1),
+                "peak_mb": round(rss.peak / 1024**2, 1),
+                "delta_mb": round((rss.peak - baseline) / 1024**2, 1),
+            })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    yolo_batch = subparsers.add_parser("yolo-batch", help="YOLO batch size throughput")
+    yolo_batch.add_argument("pdf")
+    yolo_batch.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    yolo_batch.add_argument("--zoom", type=float, default=3)
+    yolo_batch.add_argument("--max-pages", type=int, default=None)
+
+    page_memory = subparsers.add_parser("page-memory", help="Peak RSS per page of the OCR route")
+    page_memory.add_argument("pdf")
+    page_memory.add_argument("--dpi", type=float, default=None)
+    page_memory.add_argument("--binarize", choices=[BINARIZE_OTSU, BINARIZE_ADAPTIVE], default=None)
+    page_memory.add_argument("--max-pages", type=int, default=None)
+
+    args = parser.parse_args()
+
+    if args.command == "yolo-batch":
+        for row in benchmark_yolo_batch(
+            args.pdf, args.batch_sizes, zoom=args.zoom, max_pages=args.max_pages
+        ):
+            print(
+                f"batch={row['batch_size']:>3} pages={row['pages']:>4} "
+                f"time={row['seconds']:>8.2f}s throughput={row['pages_per_second']:.2f} pages/s"
+            )
+    elif args.command == "page-memory":
+        rows = benchmark_page_memory(
+            args.pdf, dpi=args.dpi, binarize=args.binarize, max_pages=args.max_pages
+        )
+        for row in rows:
+            print(
+                f"page={row['page']:>4} image={row['megapixels']:>5.1f} MP "
+                f"baseline={row['baseline_mb']:>8.1f} MB peak={row['peak_mb']:>8.1f} MB "
+                f"(+{row['delta_mb']:.1f} MB)"
+            )
+        if rows:
+            print(f"max page delta: {max(row['delta_mb'] for row in rows):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
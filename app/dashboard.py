@@ -4,7 +4,6 @@ import os
 import shutil
 import torch
 import pymupdf
-import json
 import time
 import re
 from pathlib import Path
@@ -16,7 +15,8 @@ import atexit
 
 from pdf_process import (
     handle_pdf_download_from_dataset,
-    read_dataset,
+    count_download_items,
+    read_dataset_preview,
     ensure_temp_dir,
     clear_temp_dir,
     download_pdf,
@@ -25,6 +25,7 @@ from pdf_process import (
 )
 from export_results import (
     process_pdf,
+    warmup as warmup_docling,
     OUTPUT_DIR,
 )
 
@@ -32,11 +33,17 @@ from Pymu_Tesseract_Finetuned import (
     process_pdf_pymu_tesseract,
     FOLDER_OUTPUT_PYMU_TESSERACT,
 )
+from scheduler import run_batch
+from page_render import BINARIZE_ADAPTIVE, BINARIZE_OTSU
+from ingest import ingest_dataset
+from result_writer import load_result
+from result_index import get_result_index
 
 # Constants
 EXTENSION = {
     "csv": [".csv"],
     "xlsx": [".xlsx"],
+    "parquet": [".parquet"],
     "pdf": [".pdf"],
 }
 
@@ -142,17 +149,24 @@ def has_extracted_data(output_dir: str | Path, export_to_markdown: bool):
     elif st.session_state["method_option"] == "PyMuPDF + Tesseract":
         output_dir = FOLDER_OUTPUT_PYMU_TESSERACT
 
+    # The completion index answers without listing the output directory
+    if get_result_index().has_complete(output_dir):
+        return False
+
     if export_to_markdown:
         # Use glob for efficient file matching
         extracted_files = glob(
-            pathname="**/*.json", root_dir=output_dir, recursive=True
+            pathname="**/*.json*", root_dir=output_dir, recursive=True
         )
     elif st.session_state["method_option"] == "PyMuPDF + Tesseract":
         extracted_files = glob(
-            pathname="**/*.json", root_dir=output_dir, recursive=True
+            pathname="**/*.json*", root_dir=output_dir, recursive=True
         )
     else:
-        extracted_files = [f for f in os.listdir(output_dir) if f.endswith(".json")]
+        # Results kept as JSONL sidecars count as well
+        extracted_files = [
+            f for f in os.listdir(output_dir) if f.endswith((".json", ".jsonl"))
+        ]
 
     return False if len(extracted_files) > 0 else True
 
@@ -188,6 +202,38 @@ def render_sidebar():
         key="number_thread",
     )
 
+    st.sidebar.number_input(
+        "Parallel Workers",
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        value=1,
+        step=1,
+        key="workers",
+        help="Number of PDFs processed at the same time, each in its own process.",
+    )
+    st.sidebar.number_input(
+        "Page Workers per PDF",
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        value=1,
+        step=1,
+        key="page_workers",
+        help="Split large PDFs into page ranges processed in parallel (PyMuPDF + Tesseract).",
+    )
+    st.sidebar.toggle(
+        "Pipelined page stages",
+        value=False,
+        help="Overlap rendering and detection of the next pages with OCR of the current one (PyMuPDF + Tesseract).",
+        key="pipelined",
+    )
+    st.sidebar.selectbox(
+        "OCR binarization",
+        options=[None, BINARIZE_OTSU, BINARIZE_ADAPTIVE],
+        format_func=lambda option: {None: "None", BINARIZE_OTSU: "Otsu", BINARIZE_ADAPTIVE: "Adaptive"}[option],
+        help="Threshold the grayscale page renders before OCR (PyMuPDF + Tesseract). Adaptive copes with uneven scans.",
+        key="binarize",
+    )
+
     export_to_markdown = st.sidebar.checkbox("Export to Markdown", value=False)
     overwrite = st.sidebar.toggle(
         "Overwrite existing files",
@@ -195,6 +241,12 @@ def render_sidebar():
         help="Overwrite existing files if they exist.",
         key="overwrite",
     )
+    st.sidebar.toggle(
+        "Whole document conversion (Docling)",
+        value=False,
+        help="Mask all pages in memory and convert the whole document in one Docling call.",
+        key="whole_document",
+    )
 
     # Selector tab for Dataset Upload or Download from URL
     tab1, tab2 = st.sidebar.tabs(["Upload Dataset", "Download PDF from URL"])
@@ -202,8 +254,8 @@ def render_sidebar():
     with tab1:
         # Dataset handling
         dataset_files = st.file_uploader(
-            "Upload Dataset (CSV/Excel/PDF)",
-            type=["csv", "xlsx", "pdf"],
+            "Upload Dataset (CSV/Excel/Parquet/PDF)",
+            type=["csv", "xlsx", "parquet", "pdf"],
             accept_multiple_files=True,
             key=st.session_state["file_uploader_key"],
             on_change=toast_upload_success,
@@ -232,12 +284,13 @@ def render_sidebar():
 
     if dataset_files:
         for dataset_file in dataset_files:
-            if re.search(r"\.(csv|xlsx)$", dataset_file.name, re.IGNORECASE):
+            if re.search(r"\.(csv|xlsx|parquet)$", dataset_file.name, re.IGNORECASE):
                 temp_file_path = DATA_TEMP / dataset_file.name
                 with open(temp_file_path, "wb") as f:
                     f.write(dataset_file.getbuffer())
 
-                df = read_dataset(temp_file_path)
+                # Only the header and a sample row, the downloads read the file in chunks
+                df = read_dataset_preview(temp_file_path)
                 column_list = df.columns.tolist()
 
                 st.session_state["uploaded_files_meta"][str(dataset_file.name)] = {
@@ -254,7 +307,11 @@ def render_sidebar():
         st.rerun()
 
     # Combined sidebar for existing dataset and PDF files
-    existing_files = list(DATA_TEMP.glob("*.csv")) + list(DATA_TEMP.glob("*.xlsx"))
+    existing_files = (
+        list(DATA_TEMP.glob("*.csv"))
+        + list(DATA_TEMP.glob("*.xlsx"))
+        + list(DATA_TEMP.glob("*.parquet"))
+    )
     existing_pdfs = list(TEMP_DIR_PDF.glob("*.pdf"))
 
     if existing_files or existing_pdfs:
@@ -268,7 +325,7 @@ def render_sidebar():
             )
             if selected_file:
                 selected_file_path = DATA_TEMP / selected_file
-                df = read_dataset(selected_file_path)
+                df = read_dataset_preview(selected_file_path)
                 column_list = df.columns.tolist()
                 st.session_state["temp_file_path"] = selected_file_path
         else:
@@ -295,10 +352,10 @@ def render_sidebar():
     if df is not None and column_list:
         id_col = st.sidebar.selectbox("Select ID Column", options=column_list)
         with st.sidebar.expander(f"Sample {id_col}", expanded=False):
-            st.write(f"Sample: {df.loc[0, id_col]}")
+            st.write(f"Sample: {df[id_col].iloc[0] if not df.empty else '-'}")
         url_col = st.sidebar.selectbox("Select URL Column", options=column_list)
         with st.sidebar.expander(f"Sample {url_col}", expanded=False):
-            st.write(f"Sample: {df.loc[0, url_col]}")
+            st.write(f"Sample: {df[url_col].iloc[0] if not df.empty else '-'}")
     else:
         id_col = None
         url_col = None
@@ -315,6 +372,14 @@ def render_sidebar():
             help="Download PDFs from the dataset.",
         )
 
+    st.sidebar.button(
+        "Download & Process",
+        key="ingest_pdfs",
+        icon=":material/sync:",
+        help="Process every PDF as soon as it is downloaded, with the selected method.",
+        use_container_width=True,
+    )
+
     with clear_temp_col:
         clear_temp_button = st.button(
             "Temp Files",
@@ -406,7 +471,8 @@ def confirmation_delete():
 
 def handle_download_pdfs(file_path, df, id_col, url_col):
     if df is not None and id_col != url_col:
-        total_pdf_files = df[url_col].nunique()
+        # `df` only previews the dataset, the total is counted from the file in chunks
+        total_pdf_files = count_download_items(file_path, id_col, url_col)
         total_processing = 0
         total_success = 0
         failed_files = []
@@ -441,29 +507,23 @@ def handle_download_pdfs(file_path, df, id_col, url_col):
                     url = fail.get("url")
 
                     if row_id is not None and url is not None:
-                        retry_df = df[(df[id_col] == row_id) & (df[url_col] == url)]
-
-                        if not retry_df.empty:
-                            retry_result = handle_pdf_download_from_dataset(
-                                retry_df, id_col, url_col
-                            )
-
-                            for r in retry_result:
-                                if r.get("status") in ["success", "info"]:
-                                    total_success += 1
-                                    status_type = (
-                                        "success"
-                                        if r.get("status") == "success"
-                                        else "info"
-                                    )
-                                    getattr(download_slot, status_type)(
-                                        f"Retry: {r.get('message', 'Download succeeded.' if status_type == 'success' else 'Download skipped.')}"
-                                    )
-                                else:
-                                    download_slot.error(
-                                        f"Retry: {r.get('message', 'Download failed.')}"
-                                    )
-                                retry_results.append(r)
+                        retry_result = download_pdf(row_id, url)
+                        for r in retry_result:
+                            if r.get("status") in ["success", "info"]:
+                                total_success += 1
+                                status_type = (
+                                    "success"
+                                    if r.get("status") == "success"
+                                    else "info"
+                                )
+                                getattr(download_slot, status_type)(
+                                    f"Retry: {r.get('message', 'Download succeeded.' if status_type == 'success' else 'Download skipped.')}"
+                                )
+                            else:
+                                download_slot.error(
+                                    f"Retry: {r.get('message', 'Download failed.')}"
+                                )
+                            retry_results.append(r)
 
             status.update(
                 label=f"PDF download completed. Total success {total_success}/{total_pdf_files}",
@@ -473,7 +533,91 @@ def handle_download_pdfs(file_path, df, id_col, url_col):
         st.sidebar.error("Please upload a dataset and select ID and URL columns.")
 
 
-def handle_pdf_processing(export_to_markdown, number_thread, overwrite):
+def processing_options(method, export_to_markdown, overwrite, exclude_object=True):
+    """Keyword arguments of the pipeline of `method` for the current settings."""
+    if method == "Docling":
+        return {
+            "create_markdown": export_to_markdown,
+            "overwrite": overwrite,
+            "exclude_object": exclude_object,
+            "output_dir": OUTPUT_DIR / "docling_results",
+            "whole_document": st.session_state.get("whole_document", False),
+        }
+    return {
+        "folder_output_path": FOLDER_OUTPUT_PYMU_TESSERACT,
+        "overwrite": overwrite,
+        "page_workers": st.session_state.get("page_workers", 1),
+        "pipelined": st.session_state.get("pipelined", False),
+        "binarize": st.session_state.get("binarize"),
+    }
+
+
+def handle_ingest(file_path, df, id_col, url_col, export_to_markdown, number_thread, overwrite):
+    """Downloads the dataset and extracts every PDF as soon as it is downloaded."""
+    if df is None or id_col == url_col:
+        st.sidebar.error("Please upload a dataset and select ID and URL columns.")
+        return
+
+    method = st.session_state.get("method_option", "PyMuPDF + Tesseract")
+    options = processing_options(
+        method, export_to_markdown, overwrite, st.session_state.get("exclude_object", True)
+    )
+    if method == "Docling":
+        options["number_thread"] = number_thread
+        with st.spinner("Loading Docling models..."):
+            warmup_docling(number_thread)
+
+    total_pdf_files = count_download_items(file_path, id_col, url_col)
+    counters = {"downloaded": 0, "download_failed": 0, "processed": 0, "failed": 0}
+    st.session_state["cancel_processing"] = False
+
+    with st.status("Downloading and processing PDFs...", expanded=True) as status:
+        st.button("Stop", on_click=cancel_processing, key="stop_ingest")
+        download_slot = st.empty()
+        process_slot = st.empty()
+
+        for log in ingest_dataset(
+            file_path,
+            id_col,
+            url_col,
+            method,
+            should_cancel=lambda: st.session_state["cancel_processing"],
+            **options,
+        ):
+            if log["stage"] == "download":
+                if log.get("status") in ("success", "info"):
+                    counters["downloaded"] += 1
+                    download_slot.info(log.get("message", "Download succeeded."))
+                else:
+                    counters["download_failed"] += 1
+                    download_slot.error(log.get("message", "Download failed."))
+            elif log.get("status") == "success" or "[SKIP]" in log.get("message", ""):
+                counters["processed"] += 1
+                st.session_state["uploaded_files_meta"][log["file"]] = {
+                    "extracted_at": datetime.now().isoformat(),
+                }
+                process_slot.success(log.get("message", "Processing succeeded."))
+            elif log.get("status") == "error":
+                counters["failed"] += 1
+                st.write(log.get("message", "Processing failed."))
+            else:
+                process_slot.info(log.get("message", ""))
+
+            status.update(
+                label=(
+                    f"Downloaded {counters['downloaded']}/{total_pdf_files} PDFs "
+                    f"(failed {counters['download_failed']}) | Processed {counters['processed']} "
+                    f"| Failed {counters['failed']}"
+                )
+            )
+
+        if st.session_state["cancel_processing"]:
+            status.warning("Processing canceled by user.")
+        else:
+            status.update(expanded=False)
+
+
+def handle_pdf_processing(export_to_markdown, number_thread, overwrite, workers=1):
     ensure_temp_dir(TEMP_DIR_PDF)
     pdf_files = os.listdir(TEMP_DIR_PDF)
 
@@ -517,6 +661,7 @@ def handle_pdf_processing(export_to_markdown, number_thread, overwrite):
     exclude_object_value = exclude_object.toggle(
         "Object Detection",
         value=True,
+        key="exclude_object",
         help="Use object detection during processing.",
     )
 
@@ -538,19 +683,86 @@ def handle_pdf_processing(export_to_markdown, number_thread, overwrite):
 
         total_files = len(pdf_files)
         pdf_status = st.empty()
-        total_success = 0
-        total_failed = 0
-        total_skipped = 0
 
         if extract_current_pdf:
             pdf_files = [st.session_state["selected_pdf"]]
             total_files = 1
 
+        counters = {"success": 0, "failed": 0, "skipped": 0}
+
+        def report_log(log, page_processing_slot_status):
+            if log.get("status") == "info":
+                msg = log.get("message", "SKIP")
+                if "[SKIP]" in msg:
+                    counters["success"] += 1
+                    counters["skipped"] += 1
+                page_processing_slot_status.info(
+                    log.get("message", "Processing skipped.")
+                )
+            elif log.get("status") == "success":
+                counters["success"] += 1
+                pdf_status.success(
+                    log.get("message", "Processing succeeded.")
+                )
+            elif log.get("status") == "error":
+                counters["failed"] += 1
+                st.write(log.get("message", "Processing failed."))
+            elif log.get("status") == "ocr_active":
+                page_processing_slot_status.info(
+                    log.get("message", "OCR is active.")
+                )
+            else:
+                st.write(log.get("message", "Processing failed."))
+
+        def progress_label(done):
+            return (
+                f"Processing: {done}/{total_files} PDFs | Success {counters['success']} "
+                f"| Skipped {counters['skipped']} | Failed {counters['failed']}"
+            )
+
+        docling_options = processing_options(
+            "Docling", export_to_markdown, overwrite, exclude_object_value
+        )
+        pymu_options = processing_options(
+            "PyMuPDF + Tesseract", export_to_markdown, overwrite, exclude_object_value
+        )
+
         with st.status(
             f"Processing PDFs to {'Markdown and JSON' if export_to_markdown else 'JSON'} files...",
             expanded=True,
         ) as status:
-            for idx, pdf_filename in enumerate(pdf_files, 1):
+            if workers > 1:
+                # Models are loaded inside the worker processes
+                pdf_status.info(f"Processing {total_files} PDFs with {workers} workers")
+                page_processing_slot_status = st.empty()
+                done = 0
+
+                for log in run_batch(
+                    [os.path.join(TEMP_DIR_PDF, pdf_filename) for pdf_filename in pdf_files],
+                    method_option_select,
+                    workers=workers,
+                    number_thread=number_thread,
+                    should_cancel=lambda: st.session_state["cancel_processing"],
+                    **(docling_options if method_option_select == "Docling" else pymu_options),
+                ):
+                    report_log(log, page_processing_slot_status)
+                    if log.get("status") in ("success", "error") or "[SKIP]" in log.get("message", ""):
+                        done += 1
+                        st.session_state["uploaded_files_meta"][log["file"]] = {
+                            "extracted_at": datetime.now().isoformat(),
+                        }
+                        status.update(label=progress_label(done))
+
+                if st.session_state["cancel_processing"]:
+                    status.warning("Processing canceled by user.")
+                st.session_state["process_pdf_clicked"] = False
+                page_processing_slot_status.empty()
+
+            elif method_option_select == "Docling":
+                with st.spinner("Loading Docling models..."):
+                    warmup_docling(number_thread)
+
+            for idx, pdf_filename in enumerate(pdf_files if workers <= 1 else [], 1):
                 if st.session_state["cancel_processing"]:
                     status.warning("Processing canceled by user.")
                     break
@@ -559,81 +771,24 @@ def handle_pdf_processing(export_to_markdown, number_thread, overwrite):
                 page_processing_slot_status = st.empty()
 
                 if method_option_select == "Docling":
-                    output_dir = OUTPUT_DIR / "docling_results"
-
-                    for log in process_pdf(
+                    logs = process_pdf(
                         os.path.join(TEMP_DIR_PDF, pdf_filename),
-                        create_markdown=export_to_markdown,
-                        overwrite=overwrite,
-                        exclude_object=exclude_object_value,
                         number_thread=number_thread,
-                        output_dir=output_dir,
-                    ):
-                        if log.get("status") == "info":
-                            msg = log.get("message", "SKIP")
-                            if "[SKIP]" in msg:
-                                total_success += 1
-                                total_skipped += 1
-                            page_processing_slot_status.info(
-                                log.get("message", "Processing skipped.")
-                            )
-                        elif log.get("status") == "success":
-                            total_success += 1
-                            pdf_status.success(
-                                log.get("message", "Processing succeeded.")
-                            )
-                        elif log.get("status") == "error":
-                            total_failed += 1
-                            st.write(log.get("message", "Processing failed."))
-                        elif log.get("status") == "ocr_active":
-                            page_processing_slot_status.info(
-                                log.get("message", "OCR is active.")
-                            )
-                        else:
-                            st.write(log.get("message", "Processing failed."))
-
-                    status.update(
-                        label=f"Processing: {idx}/{total_files} PDFs | Success {total_success} | Skipped {total_skipped} | Failed {total_failed}"
+                        **docling_options,
                     )
-
-                    st.session_state["process_pdf_clicked"] = False
-                    page_processing_slot_status.empty()
-
-                if method_option_select == "PyMuPDF + Tesseract":
-                    for log in process_pdf_pymu_tesseract(
+                else:
+                    logs = process_pdf_pymu_tesseract(
                         os.path.join(TEMP_DIR_PDF, pdf_filename),
-                        folder_output_path=FOLDER_OUTPUT_PYMU_TESSERACT,
-                        overwrite=overwrite,
-                    ):
-                        if log.get("status") == "info":
-                            msg = log.get("message", "SKIP")
-                            if "[SKIP]" in msg:
-                                total_success += 1
-                                total_skipped += 1
-                            page_processing_slot_status.info(
-                                log.get("message", "Processing skipped.")
-                            )
-                        elif log.get("status") == "success":
-                            total_success += 1
-                            pdf_status.success(
-                                log.get("message", "Processing succeeded.")
-                            )
-                        elif log.get("status") == "error":
-                            total_failed += 1
-                            st.write(log.get("message", "Processing failed."))
-                        elif log.get("status") == "ocr_active":
-                            page_processing_slot_status.info(
-                                log.get("message", "OCR is active.")
-                            )
-                        else:
-                            st.write(log.get("message", "Processing failed."))
-
-                    status.update(
-                        label=f"Processing: {idx}/{total_files} PDFs | Success {total_success} | Skipped {total_skipped} | Failed {total_failed}"
+                        **pymu_options,
                     )
 
-                    st.session_state["process_pdf_clicked"] = False
-                    page_processing_slot_status.empty()
+                for log in logs:
+                    report_log(log, page_processing_slot_status)
+
+                status.update(label=progress_label(idx))
+
+                st.session_state["process_pdf_clicked"] = False
+                page_processing_slot_status.empty()
 
                 st.session_state["uploaded_files_meta"][str(pdf_filename)] = {
                     "extracted_at": datetime.now().isoformat(),
@@ -643,7 +798,7 @@ def handle_pdf_processing(export_to_markdown, number_thread, overwrite):
 
             if not st.session_state["cancel_processing"]:
                 status.success(
-                    f"PDFs converted to {'Markdown and JSON' if export_to_markdown else 'JSON'} files. Total Success: {total_success}, Skipped {total_skipped}, Failed: {total_failed}"
+                    f"PDFs converted to {'Markdown and JSON' if export_to_markdown else 'JSON'} files. Total Success: {counters['success']}, Skipped {counters['skipped']}, Failed: {counters['failed']}"
                 )
                 st.rerun()
 
@@ -736,25 +891,23 @@ def render_pdf_preview(pdf_files, export_to_markdown):
     query_pdf = Path(query_pdf)
 
     pdf_path = TEMP_DIR_PDF / query_pdf
-    doc = pymupdf.open(pdf_path)
-
-    if doc is None:
-        st.error("Failed to open the PDF document.")
-        return
+    # Only the page count is needed, the viewer reads the file itself
+    with pymupdf.open(pdf_path) as doc:
+        page_count = doc.page_count
 
-    if doc.page_count == 0:
+    if page_count == 0:
         st.error("The PDF document is empty.")
         return
 
     page_number = st.number_input(
         "Select Page Number",
         min_value=1,
-        max_value=doc.page_count,
+        max_value=page_count,
         value=1,
         step=1,
         key="page_number",
     )
-    st.write(f"Page {page_number} of {doc.page_count}")
+    st.write(f"Page {page_number} of {page_count}")
 
     pdf, result = st.columns(2, border=True)
 
@@ -785,50 +938,53 @@ def render_pdf_preview(pdf_files, export_to_markdown):
         else:
             result_path = os.path.join(base_path, pdf_id + ".json")
 
-        if os.path.exists(result_path):
-            with open(result_path, "r", encoding="utf-8") as f:
-                json_result = json.load(f)
-                total_duration = json_result.get("total_time", 0)
-                content = json_result.get("content", [])
-                json_for_copy = [
-                    {"page": p["page"], "content": p["content"]} for p in content
-                ]
-                st.json(json_result, expanded=False)
-
-                if 0 <= page_number - 1 < len(content):
-                    selected_page = content[page_number - 1]["content"]
-                    dur_per_page = content[page_number - 1].get("duration", 0)
-                    parse_score = content[page_number - 1].get("parse_score", 0)
-                    layout_score = content[page_number - 1].get("layout_score", 0)
-                    table_score = content[page_number - 1].get("table_score", 0) or 0
-                    ocr_score = content[page_number - 1].get("ocr_score", 0) or 0
-
-                    raw_md_button = st.button(
-                        "Copy Raw Markdown",
-                        key=f"raw_md_{pdf_id}_{page_number}",
-                        help="Click to view raw markdown content.",
+        json_result = load_result(result_path)
+        if json_result is not None:
+            total_duration = json_result.get("total_time", 0)
+            content = json_result.get("content", [])
+            json_for_copy = [
+                {"page": p["page"], "content": p["content"]} for p in content
+            ]
+            st.json(json_result, expanded=False)
+
+            if 0 <= page_number - 1 < len(content):
+                selected_page = content[page_number - 1]["content"]
+                dur_per_page = content[page_number - 1].get("duration", 0)
+                parse_score = content[page_number - 1].get("parse_score", 0)
+                layout_score = content[page_number - 1].get("layout_score", 0)
+                table_score = content[page_number - 1].get("table_score", 0) or 0
+                ocr_score = content[page_number - 1].get("ocr_score", 0) or 0
+                route = content[page_number - 1].get("route") or content[page_number - 1].get("ocr_mode")
+                page_type = content[page_number - 1].get("page_type")
+
+                raw_md_button = st.button(
+                    "Copy Raw Markdown",
+                    key=f"raw_md_{pdf_id}_{page_number}",
+                    help="Click to view raw markdown content.",
+                )
+                if raw_md_button:
+                    pyperclip.copy(selected_page)
+                    st.session_state["already_copied"] = True
+                    st.rerun()
+
+                with st.expander("Processing Details", expanded=False):
+                    st.markdown(
+                        f"""
+                        - **Total Duration**: {total_duration:.2f} seconds
+                        - **Time for Page {page_number}**: {dur_per_page:.2f} seconds
+                        - **Parse Score**: {parse_score:.4f}
+                        - **Layout Score**: {layout_score:.4f}
+                        - **Table Score**: {table_score:.4f}
+                        - **OCR Score**: {ocr_score:.4f}
+                        """
                     )
-                    if raw_md_button:
-                        pyperclip.copy(selected_page)
-                        st.session_state["already_copied"] = True
-                        st.rerun()
-
-                    with st.expander("Processing Details", expanded=False):
-                        st.markdown(
-                            f"""
-                            - **Total Duration**: {total_duration:.2f} seconds
-                            - **Time for Page {page_number}**: {dur_per_page:.2f} seconds
-                            - **Parse Score**: {parse_score:.4f}
-                            - **Layout Score**: {layout_score:.4f}
-                            - **Table Score**: {table_score:.4f}
-                            - **OCR Score**: {ocr_score:.4f}
-                            """
-                        )
-                    with st.container(key="markdown_result", height=600):
-                        st.write(selected_page, unsafe_allow_html=True)
+                    if route:
+                        st.markdown(f"- **Route**: {route} ({page_type} page)")
+                with st.container(key="markdown_result", height=600):
+                    st.write(selected_page, unsafe_allow_html=True)
 
-                else:
-                    st.info("No markdown content for this page.")
+            else:
+                st.info("No markdown content for this page.")
         else:
             st.info("No result JSON found for this PDF.")
 
@@ -875,6 +1031,12 @@ def main():
         except Exception as e:
             st.error("Error during downloading PDFs: Please check your dataset")
 
+    if st.session_state.get("ingest_pdfs"):
+        handle_ingest(
+            st.session_state["temp_file_path"], df, id_col, url_col,
+            export_to_markdown, number_thread, overwrite,
+        )
+
     # Handle temp clearing
     if clear_temp_button:
         clear_temp_dir(TEMP_DIR)
@@ -886,7 +1048,9 @@ def main():
     clean_old_files(max_age_minutes=30)
 
     # PDF processing
-    pdf_files = handle_pdf_processing(export_to_markdown, number_thread, overwrite)
+    pdf_files = handle_pdf_processing(
+        export_to_markdown, number_thread, overwrite, st.session_state.get("workers", 1)
+    )
 
     # PDF Preview
     if pdf_files:
@@ -0,0 +1,115 @@
+"""Batched YOLO detection stage shared by both extraction pipelines."""
+
+import math
+import time
+
+DEFAULT_BATCH_SIZE = 4
+
+
+def results_to_bounding_boxes(result, names: dict):
+    """
+    Groups the boxes of a single YOLO result by label name.
+
+    Args:
+        result (ultralytics.engine.results.Results): Detection result of one image.
+        names (dict): Class id to label name mapping of the model.
+
+    Returns:
+        dict: Label name mapped to a list of (x1, y1, x2, y2) pixel boxes.
+    """
+    bounding_boxes = {label: [] for label in names.values()}
+    boxes = result.boxes.xyxy.cpu().numpy()
+    classes = result.boxes.cls.cpu().numpy()
+
+    for box, cls in zip(boxes, classes):
+        x1, y1, x2, y2 = map(int, box[:4])
+        bounding_boxes[names[int(cls)]].append((x1, y1, x2, y2))
+
+    return bounding_boxes
+
+
+def scale_bounding_boxes(bounding_boxes: dict, factor: float):
+    """
+    Scales boxes detected on one rendering of a page to another one.
+
+    Args:
+        bounding_boxes (dict): Label name mapped to (x1, y1, x2, y2) pixel boxes.
+        factor (float): Ratio of the target zoom to the detection zoom.
+
+    Returns:
+        dict: The boxes in pixels of the target rendering.
+    """
+    if factor == 1:
+        return bounding_boxes
+    return {
+        label: [
+            (int(x1 * factor), int(y1 * factor), math.ceil(x2 * factor), math.ceil(y2 * factor))
+            for x1, y1, x2, y2 in boxes
+        ]
+        for label, boxes in bounding_boxes.items()
+    }
+
+
+def detect_batch(model, images: list, conf: float = 0.25):
+    """
+    Runs YOLO on a list of images with a single predict call.
+
+    Args:
+        model (YOLO): Loaded YOLO model.
+        images (list[np.ndarray]): BGR images.
+        conf (float): Minimum confidence of the returned boxes.
+
+    Returns:
+        list[dict]: Bounding boxes per image, see `results_to_bounding_boxes`.
+    """
+    if not images:
+        return []
+    results = model.predict(images, verbose=False, conf=conf)
+    return [results_to_bounding_boxes(result, model.names) for result in results]
+
+
+def iter_page_detections(
+    doc,
+    model,
+    render,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    conf: float = 0.25,
+    page_numbers=None,
+):
+    """
+    Rasterizes pages `batch_size` at a time and detects objects on each batch.
+
+    Args:
+        doc (pymupdf.Document): The opened PDF document.
+        model (YOLO): Loaded YOLO model.
+        render (callable): Called with a page, returns `(payload, bgr_image)`. The
+            payload is handed downstream untouched, the BGR image is used for detection.
+        batch_size (int): Number of pages rasterized ahead and detected at once.
+        conf (float): Minimum confidence of the returned boxes.
+        page_numbers (Iterable[int] | None): 0-based pages to process, all by default.
+
+    Yields:
+        tuple: `(page, payload, bounding_boxes, detect_secs)` in page order, where
+        `detect_secs` is the page's share of the render and detection time of its batch.
+    """
+    if page_numbers is None:
+        page_numbers = range(doc.page_count)
+    page_numbers = list(page_numbers)
+    batch_size = max(1, int(batch_size))
+
+    for start in range(0, len(page_numbers), batch_size):
+        start_time = time.perf_counter()
+        pages, payloads, images = [], [], []
+        for page_number in page_numbers[start:start + batch_size]:
+            page = doc.load_page(page_number)
+            payload, image = render(page)
+            pages.append(page)
+            payloads.append(payload)
+            images.append(image)
+
+        detections = detect_batch(model, images, conf=conf)
+        del images
+        detect_secs = (time.perf_counter() - start_time) / len(pages)
+
+        for page, payload, bounding_boxes in zip(pages, payloads, detections):
+            yield page, payload, bounding_boxes, detect_secs
@@ -1,18 +1,16 @@
 from pathlib import Path
-import gc
-import shutil
-import json
 import time
 import os
 import pymupdf
 from pymupdf import Page
-from ultralytics import YOLO
 import math
 import re
+import threading
+from io import BytesIO
 
 from docling_core.types.doc import PictureItem, TextItem
 
-from docling.datamodel.base_models import InputFormat
+from docling.datamodel.base_models import DocumentStream, InputFormat
 from docling.datamodel.pipeline_options import (
     AcceleratorDevice,
     AcceleratorOptions,
@@ -26,9 +24,16 @@ from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling.utils.model_downloader import download_models
 
 from helper import logging_process, check_json_file_exists
+from result_writer import ResultWriter, load_completed_pages
+from model_registry import get_yolo_model, get_yolo_weights_hash
+from extraction_cache import config_hash, file_sha256, get_extraction_cache, iter_with_cached_pages
+from scheduler import METHOD_DOCLING
+from page_render import choose_detection_dpi, pixmap_to_bgr, render_page
+from memory_guard import MemoryGuard
+from detection import DEFAULT_BATCH_SIZE, iter_page_detections
+from page_analysis import PAGE_SCANNED, classify_page
 
 import warnings
-from glob import glob
 warnings.filterwarnings("ignore")
 
 # --- Constants ---
@@ -37,24 +42,134 @@ PDF_PATH = Path("app/pdf")
 TEMP_IMAGE_DIR = Path("app/temp/image")
 ARTIFACT_PATH = Path("app/models")
 
-def get_latest_yolo_model_path(yolo_dir="app/yolo"):
-    """
-    Get the latest YOLO model file from the specified directory.
+settings.debug.profile_pipeline_timings = True
+
+# Converters are expensive to build (layout, TableFormer and EasyOCR models are
+# initialized on construction), so they are cached per process and keyed by the
+# pipeline options that affect their behaviour.
+_converter_cache = {}
+_converter_lock = threading.Lock()
+_ocr_pass_stats = {"double_pass": 0, "double_pass_avoided": 0, "blank_pages": 0}
+
+
+# --- Docling Converter Cache ---
+def _build_pipeline_options(
+    number_thread, force_full_page_ocr, do_table_structure, do_cell_matching
+):
+    accelerator_options = AcceleratorOptions(
+        num_threads=number_thread, device=AcceleratorDevice.AUTO
+    )
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.artifacts_path = ARTIFACT_PATH
+    pipeline_options.accelerator_options = accelerator_options
+    pipeline_options.do_ocr = True
+    pipeline_options.do_table_structure = do_table_structure
+    pipeline_options.images_scale = 2.0
+    pipeline_options.table_structure_options.do_cell_matching = do_cell_matching
+    pipeline_options.generate_picture_images = True
+
+    # pipeline_options.ocr_options = TesseractCliOcrOptions(
+    #     lang=["eng", "id"],
+    #     force_full_page_ocr=force_full_page_ocr,
+    #     tesseract_cmd="tesseract",
+    # )
+
+    pipeline_options.ocr_options = EasyOcrOptions(
+        lang=["en", "id"],
+        force_full_page_ocr=force_full_page_ocr,
+    )
+    return pipeline_options
+
+
+def _build_document_converter(
+    number_thread, force_full_page_ocr, do_table_structure, do_cell_matching
+):
+    # Check if the models are already downloaded
+    if not os.path.exists(ARTIFACT_PATH):
+        download_models(output_dir=ARTIFACT_PATH, progress=True)
+
+    pipeline_options = _build_pipeline_options(
+        number_thread, force_full_page_ocr, do_table_structure, do_cell_matching
+    )
+    return DocumentConverter(
+        allowed_formats=[InputFormat.PDF, InputFormat.IMAGE],
+        format_options={
+            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options),
+        },
+    )
+
+
+def converter_cache_options(do_table_structure: bool = True, do_cell_matching: bool = True):
+    """Get the pipeline options that change the converted text, for the extraction cache key.
+
+    The options come from `_build_pipeline_options`, so a change of the OCR
+    engine, its languages or the table settings changes the key. The thread
+    count and model path do not change the output, and the full page OCR mode
+    is chosen per page, so they are left out.
+
     Args:
-        yolo_dir (str): Directory where YOLO model files are stored.
+        - do_table_structure (bool): Whether to run table structure recognition.
+        - do_cell_matching (bool): Whether to match table cells to PDF text cells.
+
     Returns:
-        Path: Path to the latest YOLO model file.
-    Raises:
-        FileNotFoundError: If no YOLO model files are found in the specified directory.
+        - options (dict): JSON serializable pipeline options.
     """
-    yolo_files = sorted(
-        glob(str(Path(yolo_dir) / "*.pt")),
-        key=lambda f: os.path.getmtime(f),
-        reverse=True,
+    pipeline_options = _build_pipeline_options(1, False, do_table_structure, do_cell_matching)
+    return pipeline_options.model_dump(
+        mode="json",
+        exclude={
+            "artifacts_path": True,
+            "accelerator_options": True,
+            "ocr_options": {"force_full_page_ocr"},
+        },
     )
-    if not yolo_files:
-        raise FileNotFoundError(f"YOLO model file not found at {yolo_dir}/")
-    return Path(yolo_files[0])
+
+
+def get_document_converter(
+    number_thread: int = 4,
+    force_full_page_ocr: bool = False,
+    do_table_structure: bool = True,
+    do_cell_matching: bool = True,
+):
+    """Get a cached Docling converter for the given pipeline options.
+
+    Args:
+        - number_thread (int): Number of threads used by the accelerator.
+        - force_full_page_ocr (bool): Whether to force full page OCR.
+        - do_table_structure (bool): Whether to run table structure recognition.
+        - do_cell_matching (bool): Whether to match table cells to PDF text cells.
+
+    Returns:
+        - converter (DocumentConverter): Converter built once per process and reused.
+    """
+    key = (number_thread, force_full_page_ocr, do_table_structure, do_cell_matching)
+    with _converter_lock:
+        converter = _converter_cache.get(key)
+        if converter is None:
+            converter = _build_document_converter(*key)
+            _converter_cache[key] = converter
+    return converter
+
+
+def warmup(number_thread: int = 4, force_full_page_ocr_modes=(False, True)):
+    """Build the converters and initialize their PDF pipelines ahead of time.
+
+    Loading the layout, TableFormer and OCR models happens here instead of
+    during the conversion of the first page.
+
+    Args:
+        - number_thread (int): Number of threads used by the accelerator.
+        - force_full_page_ocr_modes (tuple): OCR modes to prepare converters for.
+    """
+    for force_full_page_ocr in force_full_page_ocr_modes:
+        converter = get_document_converter(number_thread, force_full_page_ocr)
+        converter.initialize_pipeline(InputFormat.PDF)
+
+
+def clear_converter_cache():
+    """Release all cached Docling converters."""
+    with _converter_lock:
+        _converter_cache.clear()
 
 # --- PDF Utilities ---
 def yolo_to_pdf_rectangles(boxes, zoom):
@@ -132,42 +247,7 @@ def extract_text_from_pdf_page(
         - doc_conversion_secs (float): Time taken for document conversion.
     """
 
-    # Check if the models are already downloaded
-    if not os.path.exists(ARTIFACT_PATH):
-        download_models(output_dir=ARTIFACT_PATH, progress=True)
-
-    accelerator_options = AcceleratorOptions(
-        num_threads=number_thread, device=AcceleratorDevice.AUTO
-    )
-    pipeline_options = PdfPipelineOptions()
-    pipeline_options.artifacts_path = ARTIFACT_PATH
-    pipeline_options.accelerator_options = accelerator_options
-    pipeline_options.do_ocr = True
-    pipeline_options.do_table_structure = True
-    # pipeline_options.do_table_structure = False
-    pipeline_options.images_scale = 2.0
-    pipeline_options.table_structure_options.do_cell_matching = True
-    # pipeline_options.table_structure_options.do_cell_matching = False
-    pipeline_options.generate_picture_images = True
-    settings.debug.profile_pipeline_timings = True
-
-    # pipeline_options.ocr_options = TesseractCliOcrOptions(
-    #     lang=["eng", "id"],
-    #     force_full_page_ocr=force_full_page_ocr,
-    #     tesseract_cmd="tesseract",
-    # )
-
-    pipeline_options.ocr_options = EasyOcrOptions(
-        lang=["en", "id"],
-        force_full_page_ocr=force_full_page_ocr,
-    )
-
-    converter = DocumentConverter(
-        allowed_formats=[InputFormat.PDF, InputFormat.IMAGE],
-        format_options={
-            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options),
-        },
-    )
+    converter = get_document_converter(number_thread, force_full_page_ocr)
     conv_result = converter.convert(src_path)
     doc_conversion_secs = round(conv_result.timings["pipeline_total"].times[0], 2)
     text = conv_result.document.export_to_markdown(escape_underscores=False)
@@ -185,6 +265,336 @@ def extract_text_from_pdf_page(
 
     return text, doc_conversion_secs, confidence_data
 
+def iter_masked_pages(
+    pdf, model, zoom: float | None = None, batch_size: int = DEFAULT_BATCH_SIZE,
+    debug_image_dir: Path | None = None, page_numbers=None,
+):
+    """
+    Yields the pages of a document with the objects detected by YOLO redacted.
+
+    Pages are rasterized and detected `batch_size` at a time. Only the in-memory
+    document is modified.
+
+    Args:
+        pdf (pymupdf.Document): The opened PDF document.
+        model (YOLO | None): Loaded YOLO model, or None to skip object exclusion.
+        zoom (float | None): Zoom factor used to rasterize the pages for detection,
+            chosen per page with `choose_detection_dpi` by default.
+        batch_size (int): Number of pages detected with a single predict call.
+        debug_image_dir (Path | None): If set, the rasterized pages are saved there as PNG.
+        page_numbers (Iterable[int] | None): 0-based pages to yield, all by default.
+
+    Yields:
+        Page: The masked page, in page order.
+    """
+    if page_numbers is None:
+        page_numbers = range(pdf.page_count)
+
+    if model is None:
+        for page_number in page_numbers:
+            yield pdf.load_page(page_number)
+        return
+
+    def render(page):
+        page_zoom = zoom if zoom is not None else choose_detection_dpi(page) / 72
+        page_image = render_page(page, page_zoom)
+        if debug_image_dir is not None:
+            page_image.save(str(debug_image_dir / f"page-{page.number + 1}.png"))
+        # YOLO inference straight from the pixmap buffer, no PNG encode/decode
+        return page_zoom, pixmap_to_bgr(page_image)
+
+    # Class 0 is the object class excluded from the text extraction
+    exclude_label = model.names[0]
+    for page, page_zoom, bounding_boxes, _ in iter_page_detections(
+        pdf, model, render, batch_size=batch_size, conf=0.5, page_numbers=page_numbers
+    ):
+        boxes = bounding_boxes[exclude_label]
+        rectangles = yolo_to_pdf_rectangles(boxes, page_zoom) if boxes else []
+        if rectangles:
+            draw_bounding_boxes(page, rectangles)
+        yield page
+
+
+def clean_confidence(page_confidence: dict):
+    """Replaces NaN scores in a Docling page confidence report with None."""
+    return {
+        k: (None if isinstance(v, float) and math.isnan(v) else v)
+        for k, v in page_confidence.items()
+    }
+
+
+def convert_document_pages(
+    pdf_bytes: bytes,
+    name: str,
+    number_thread: int,
+    page_range: tuple[int, int],
+    force_full_page_ocr=False,
+):
+    """Convert a range of pages of an in-memory PDF with a single Docling call.
+
+    Args:
+        - pdf_bytes (bytes): The (masked) PDF document.
+        - name (str): File name reported to Docling.
+        - number_thread (int): Number of threads to use for OCR.
+        - page_range (tuple[int, int]): First and last page to convert (1-based, inclusive).
+        - force_full_page_ocr (bool): Whether to force full page OCR. Default is False.
+
+    Returns:
+        - pages (dict): Page number mapped to (text, duration, confidence).
+        - doc_conversion_secs (float): Time taken for the whole conversion.
+    """
+    converter = get_document_converter(number_thread, force_full_page_ocr)
+    source = DocumentStream(name=name, stream=BytesIO(pdf_bytes))
+    conv_result = converter.convert(source, page_range=page_range)
+    doc_conversion_secs = round(conv_result.timings["pipeline_total"].times[0], 2)
+
+    page_numbers = range(page_range[0], page_range[1] + 1)
+    # Docling only reports the pipeline time for the whole batch, so it is
+    # spread evenly over the converted pages.
+    page_secs = round(doc_conversion_secs / len(page_numbers), 2)
+    confidence_pages = conv_result.confidence.model_dump()["pages"]
+
+    pages = {}
+    for page_index in page_numbers:
+        text = conv_result.document.export_to_markdown(
+            escape_underscores=False, page_no=page_index
+        )
+        confidence = clean_confidence(confidence_pages.get(page_index - 1, {}))
+        pages[page_index] = (text, page_secs, confidence)
+
+    return pages, doc_conversion_secs
+
+
+def choose_ocr_mode(page: Page):
+    """
+    Picks the Docling OCR mode of a (masked) page from its text layer and images.
+
+    Blank pages are recognized first and not converted at all. Other scanned
+    pages go straight to full page OCR instead of first running a standard
+    conversion that is known to come back empty.
+
+    Args:
+        page (Page): The page to classify.
+
+    Returns:
+        tuple: (force_full_page_ocr, analysis) where analysis is the result of
+        `classify_page` with an added "blank" flag.
+    """
+    analysis = classify_page(page)
+    analysis["blank"] = is_blank_page(page, analysis)
+    return not analysis["blank"] and analysis["page_type"] == PAGE_SCANNED, analysis
+
+
+def is_blank_page(page: Page, analysis: dict):
+    """Whether a page has no text, images or drawings, so no OCR pass can find anything."""
+    return (
+        analysis["text_chars"] == 0
+        and analysis["image_coverage"] == 0
+        and not page.get_cdrawings()
+    )
+
+
+def _count_forced_pass(pass_stats, analysis):
+    # Without any text layer the standard pass came back empty and was run
+    # again with forced OCR; pages with a few characters never were retried.
+    if analysis["text_chars"] == 0:
+        pass_stats["double_pass_avoided"] += 1
+
+
+def _blank_page_result(analysis):
+    return "", 0.0, {"page_type": analysis["page_type"], "ocr_mode": "skipped_blank"}
+
+
+def _record_ocr_mode(confidence, analysis, force_full_page_ocr):
+    confidence["page_type"] = analysis["page_type"]
+    confidence["ocr_mode"] = "full_page" if force_full_page_ocr else "standard"
+    return confidence
+
+
+def _process_pages_individually(
+    pdf, model, base_name, result_dir, temp_image_dir, create_markdown, number_thread,
+    batch_size, pass_stats, page_numbers=None,
+):
+    memory_guard = MemoryGuard()
+    masked_pages = iter_masked_pages(
+        pdf, model, batch_size=batch_size, debug_image_dir=temp_image_dir,
+        page_numbers=page_numbers,
+    )
+    for page in masked_pages:
+        page_index = page.number + 1
+        force_full_page_ocr, analysis = choose_ocr_mode(page)
+        if analysis["blank"]:
+            # Nothing to OCR on the page, no Docling pass can find text either
+            pass_stats["blank_pages"] += 1
+            markdown_text, time_spent, confidence = _blank_page_result(analysis)
+            if create_markdown:
+                md_filename = result_dir / f"{base_name}-page-{page_index}.md"
+                with open(md_filename, "w+", encoding="utf-8") as md_file:
+                    md_file.write(markdown_text)
+            yield page_index, markdown_text, time_spent, confidence
+            memory_guard.check()
+            continue
+
+        page_pdf_path = result_dir / f"{base_name}-page-{page_index}.pdf"
+        with pymupdf.open() as temp_pdf:
+            temp_pdf.insert_pdf(
+                pdf,
+                from_page=page.number,
+                to_page=page.number,
+                links=False,
+                widgets=False,
+            )
+            temp_pdf.save(str(page_pdf_path), garbage=4, deflate=True)
+
+        # Scanned pages are OCR'd on the first pass already
+        markdown_text, time_spent, confidence_data = extract_text_from_pdf_page(
+            page_pdf_path,
+            result_dir / f"{base_name}-page-{page_index}",
+            create_markdown,
+            number_thread,
+            force_full_page_ocr=force_full_page_ocr,
+        )
+        if force_full_page_ocr:
+            _count_forced_pass(pass_stats, analysis)
+
+        if markdown_text is None and force_full_page_ocr:
+            # Forced OCR found nothing, running it again would not either
+            markdown_text = ""
+        elif markdown_text is None:
+            yield logging_process(
+                "info",
+                f"Page {page_index}/{pdf.page_count} of {base_name} is empty, running OCR again."
+            )
+            # The text layer check was inconclusive, so we run OCR again with force_full_page_ocr=True
+            force_full_page_ocr = True
+            markdown_text, retry_time, confidence_data = extract_text_from_pdf_page(
+                page_pdf_path,
+                result_dir / f"{base_name}-page-{page_index}",
+                create_markdown,
+                number_thread,
+                force_full_page_ocr=True,
+            )
+            time_spent = round(time_spent + retry_time, 2)
+            pass_stats["double_pass"] += 1
+
+        confidence = clean_confidence(confidence_data["pages"][0])
+        yield page_index, markdown_text, time_spent, _record_ocr_mode(
+            confidence, analysis, force_full_page_ocr
+        )
+        memory_guard.check()
+
+
+def _process_whole_document(
+    pdf, model, base_name, result_dir, temp_image_dir, create_markdown, number_thread,
+    page_chunk_size, batch_size, pass_stats, page_numbers=None,
+):
+    memory_guard = MemoryGuard()
+    page_modes = {}
+    for page in iter_masked_pages(
+        pdf, model, batch_size=batch_size, debug_image_dir=temp_image_dir,
+        page_numbers=page_numbers,
+    ):
+        page_modes[page.number + 1] = (*choose_ocr_mode(page), page)
+
+    # All redactions live in the in-memory document, nothing is written to disk.
+    pdf_bytes = pdf.tobytes(garbage=1, deflate=True)
+    name = f"{base_name}.pdf"
+    page_indexes = sorted(page_modes)
+    chunk_size = page_chunk_size or max(1, len(page_indexes))
+
+    def run_mode(page_index):
+        force_full_page_ocr, analysis, _ = page_modes[page_index]
+        return force_full_page_ocr, analysis["blank"]
+
+    for chunk_start in range(0, len(page_indexes), chunk_size):
+        chunk = page_indexes[chunk_start:chunk_start + chunk_size]
+
+        # Docling converts contiguous page ranges with a single OCR mode, so
+        # the chunk is split into runs of consecutive pages sharing the same
+        # mode. Runs of blank pages are not converted at all.
+        pages = {}
+        run_start = chunk[0]
+        for position, page_index in enumerate(chunk):
+            force_full_page_ocr, blank = run_mode(run_start)
+            next_index = chunk[position + 1] if position + 1 < len(chunk) else None
+            if next_index != page_index + 1 or run_mode(next_index) != (force_full_page_ocr, blank):
+                if blank:
+                    for blank_index in range(run_start, page_index + 1):
+                        pages[blank_index] = _blank_page_result(page_modes[blank_index][1])
+                else:
+                    run_pages, _ = convert_document_pages(
+                        pdf_bytes, name, number_thread, (run_start, page_index),
+                        force_full_page_ocr=force_full_page_ocr,
+                    )
+                    pages.update(run_pages)
+                run_start = next_index
+
+        for page_index, (markdown_text, time_spent, confidence) in sorted(pages.items()):
+            force_full_page_ocr, analysis, _ = page_modes[page_index]
+            if analysis["blank"]:
+                pass_stats["blank_pages"] += 1
+            elif force_full_page_ocr:
+                _count_forced_pass(pass_stats, analysis)
+            elif len(markdown_text.strip()) == 0:
+                yield logging_process(
+                    "info",
+                    f"Page {page_index}/{pdf.page_count} of {base_name} is empty, running OCR again."
+                )
+                # The text layer check was inconclusive, so we run OCR again with force_full_page_ocr=True
+                force_full_page_ocr = True
+                retry_pages, _ = convert_document_pages(
+                    pdf_bytes,
+                    name,
+                    number_thread,
+                    (page_index, page_index),
+                    force_full_page_ocr=True,
+                )
+                markdown_text, retry_time, confidence = retry_pages[page_index]
+                time_spent = round(time_spent + retry_time, 2)
+                pass_stats["double_pass"] += 1
+
+            if create_markdown:
+                md_filename = result_dir / f"{base_name}-page-{page_index}.md"
+                with open(md_filename, "w+", encoding="utf-8") as md_file:
+                    md_file.write(markdown_text)
+
+            if not analysis["blank"]:
+                confidence = _record_ocr_mode(confidence, analysis, force_full_page_ocr)
+            yield page_index, markdown_text, time_spent, confidence
+
+        memory_guard.check()
+
+
+def _page_result_records(page_results):
+    """Turns the page tuples of the page processors into result records, keyed by 0-based page."""
+    for page_result in page_results:
+        if isinstance(page_result, dict):
+            yield page_result
+            continue
+
+        page_index, markdown_text, time_spent, confidence = page_result
+        temp_content = {
+            "page": page_index,
+            "content": markdown_text,
+            "duration": time_spent,
+        }
+        temp_content.update(confidence)
+        yield page_index - 1, temp_content
+
+
+def get_ocr_pass_stats():
+    """
+    Gets how many pages needed a second Docling pass with forced OCR, how
+    many second passes the up-front page classification avoided, and how many
+    blank pages were not converted at all.
+
+    Returns:
+        dict: "double_pass", "double_pass_avoided" and "blank_pages" counts of this process.
+    """
+    with _converter_lock:
+        return dict(_ocr_pass_stats)
+
+
 def process_pdf(
     pdf_file: str,
     idx: int = 1,
@@ -193,6 +603,13 @@ def process_pdf(
     exclude_object=True,
     number_thread: int = 4,
     output_dir: str | Path = None,
+    whole_document=False,
+    page_chunk_size: int | None = None,
+    save_debug_images=False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    fsync=False,
+    jsonl_only=False,
+    use_cache=True,
 ):
     """
     Process a PDF file, extracting text and optionally creating markdown files.
@@ -200,17 +617,28 @@ def process_pdf(
         pdf_file (str): Path to the PDF file to process.
         idx (int): Index of the PDF file in the processing queue.
         create_markdown (bool): Whether to create markdown files from the extracted text.
-        overwrite (bool): Whether to overwrite existing JSON results.
+        overwrite (bool): Whether to overwrite existing JSON results. If False, a
+            partial result of an interrupted run is resumed after its last page.
         exclude_object (bool): Whether to exclude objects detected by YOLO.
         number_thread (int): Number of threads to use for OCR.
         output_dir (str | Path): Directory to save the output results.
+        whole_document (bool): Mask all pages in memory and convert the document with
+            one Docling call per page chunk instead of one call per page.
+        page_chunk_size (int | None): Pages per Docling call in whole document mode.
+            None converts the whole document at once.
+        save_debug_images (bool): Keep the rasterized pages used for YOLO as PNG files
+            under TEMP_IMAGE_DIR.
+        batch_size (int): Number of pages rasterized ahead and detected by YOLO at once.
+        fsync (bool): Flush every finished page to disk with fsync.
+        jsonl_only (bool): Keep the per-page JSONL file instead of compacting it
+            into the JSON result.
+        use_cache (bool): Reuse pages of identical PDFs from the extraction cache.
     Yields:
         dict: Status messages indicating the progress of the processing.
     """
-    MODEL_YOLO = get_latest_yolo_model_path()
-    model = YOLO(MODEL_YOLO)
     base_name = Path(pdf_file).stem
     pdf_path = pdf_file
+    total = "?"
 
     if create_markdown:
         result_dir = output_dir / base_name
@@ -226,94 +654,81 @@ def process_pdf(
         )
         return
 
+    model = get_yolo_model() if exclude_object else None
+
     try:
-        with pymupdf.open(pdf_path) as pdf:
-            result_json = {"content": [], "total_page": pdf.page_count}
-            temp_image_dir = TEMP_IMAGE_DIR / base_name
-            temp_image_dir.mkdir(parents=True, exist_ok=True)
+        with pymupdf.open(pdf_path) as pdf, ResultWriter(
+            json_result_path, pdf.page_count, fsync=fsync, jsonl_only=jsonl_only, allow_nan=False
+        ) as writer:
+            temp_image_dir = None
+            if save_debug_images:
+                temp_image_dir = TEMP_IMAGE_DIR / base_name
+                temp_image_dir.mkdir(parents=True, exist_ok=True)
             total = pdf.page_count
-            total_times = 0
-
-            for i, page in enumerate(pdf.pages()):
-                page_index = i + 1
-                zoom = 3
-                mat = pymupdf.Matrix(zoom, zoom)
-                page_image = page.get_pixmap(matrix=mat)
-                image_path = temp_image_dir / f"{base_name}-page-{page_index}.png"
-                page_image.save(str(image_path))
-                
-                if exclude_object:
-                    # YOLO inference
-                    results = model.predict(str(image_path), verbose=False, conf=0.5)
-
-                    result_dict = {
-                        "cls": results[0].boxes.cls.cpu().numpy(),
-                        "box": results[0].boxes.xyxy.cpu().numpy(),
-                    }
-
-                    # Filter boxes based on class values
-                    boxes = []
-                    for i, cls_value in enumerate(result_dict["cls"]):
-                        if cls_value == 0:
-                            boxes.append(result_dict["box"][i])
-
-                    rectangles = yolo_to_pdf_rectangles(boxes, zoom) if boxes else []
-                    if rectangles:
-                        page = draw_bounding_boxes(page, rectangles)
-                    
-                    del results, result_dict, boxes, rectangles
-                    gc.collect()
-
-                page_pdf_path = result_dir / f"{base_name}-page-{page_index}.pdf"
-                with pymupdf.open() as temp_pdf:
-                    temp_pdf.insert_pdf(
-                        pdf,
-                        from_page=page.number,
-                        to_page=page.number,
-                        links=False,
-                        widgets=False,
-                    )
-                    temp_pdf.save(str(page_pdf_path), garbage=4, deflate=True)
+            pass_stats = {"double_pass": 0, "double_pass_avoided": 0, "blank_pages": 0}
 
-                # Checking if the PDF is scanned and needs OCR
-                markdown_text, time_spent, confidence_data = extract_text_from_pdf_page(
-                    page_pdf_path,
-                    result_dir / f"{base_name}-page-{page_index}",
-                    create_markdown,
-                    number_thread,
+            done_pages = [] if overwrite else load_completed_pages(json_result_path, total)
+            writer.open(done_pages)
+            total_times = sum(record["duration"] for record in done_pages)
+            if done_pages:
+                yield logging_process(
+                    "info",
+                    f"Resuming {base_name} at page {len(done_pages) + 1}/{total}, "
+                    f"{len(done_pages)} pages already extracted."
                 )
 
-                if markdown_text is None:
+            # Pages of identical PDFs converted before are taken from the cache
+            cache = get_extraction_cache() if use_cache else None
+            cached = {}
+            if cache is not None:
+                doc_hash = file_sha256(pdf_path)
+                cache_config = config_hash(
+                    METHOD_DOCLING,
+                    yolo_weights=get_yolo_weights_hash() if exclude_object else None,
+                    whole_document=whole_document,
+                    page_chunk_size=page_chunk_size,
+                    pipeline_options=converter_cache_options(),
+                )
+                cached = cache.get_pages(doc_hash, cache_config, range(len(done_pages) + 1, total + 1))
+                if cached:
                     yield logging_process(
                         "info",
-                        f"Page {page_index}/{pdf.page_count} of {base_name} is empty, running OCR again."
+                        f"{len(cached)} pages of {base_name} found in the extraction cache."
                     )
-                    # If the text is empty, it might be a scanned PDF, so we run OCR again with force_full_page_ocr=True
-                    markdown_text, time_spent, confidence_data = extract_text_from_pdf_page(
-                        page_pdf_path,
-                        result_dir / f"{base_name}-page-{page_index}",
-                        create_markdown,
-                        number_thread,
-                        force_full_page_ocr=True,
-                    )
-
-                temp_content = {
-                    "page": page_index,
-                    "content": markdown_text,
-                    "duration": time_spent,
-                }
-
-                confidence_data["pages"][0] = {
-                    k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in confidence_data["pages"][0].items()
-                }
-                
+            page_numbers = [n for n in range(len(done_pages), total) if n + 1 not in cached]
 
-                temp_content.update(confidence_data["pages"][0])
-
-                result_json["content"].append(
-                    temp_content
+            if whole_document:
+                page_results = _process_whole_document(
+                    pdf, model, base_name, result_dir, temp_image_dir,
+                    create_markdown, number_thread, page_chunk_size, batch_size,
+                    pass_stats, page_numbers=page_numbers,
+                )
+            else:
+                page_results = _process_pages_individually(
+                    pdf, model, base_name, result_dir, temp_image_dir,
+                    create_markdown, number_thread, batch_size, pass_stats,
+                    page_numbers=page_numbers,
                 )
 
+            for item in iter_with_cached_pages(_page_result_records(page_results), cached):
+                if isinstance(item, dict):
+                    yield item
+                    continue
+
+                _, temp_content, from_cache = item
+                if from_cache:
+                    temp_content = {**temp_content, "duration": 0.0, "cached": True}
+                    if create_markdown:
+                        md_filename = result_dir / f"{base_name}-page-{temp_content['page']}.md"
+                        with open(md_filename, "w+", encoding="utf-8") as md_file:
+                            md_file.write(temp_content["content"])
+                elif cache is not None:
+                    cache.put_page(doc_hash, cache_config, temp_content["page"], temp_content)
+                page_index = temp_content["page"]
+                time_spent = temp_content["duration"]
+
+                writer.append(temp_content)
+
                 total_times += time_spent
 
                 yield logging_process(
@@ -321,32 +736,21 @@ def process_pdf(
                     f"Processed page {page_index}/{pdf.page_count} of {base_name} in {time.strftime('%H:%M:%S', time.gmtime(time_spent))}"
                 )
 
-                del (
-                    mat,
-                    page_image,
-                    page_pdf_path,
-                    markdown_text,
-                    time_spent,
-                )
-                gc.collect()
+            with _converter_lock:
+                for key, value in pass_stats.items():
+                    _ocr_pass_stats[key] += value
 
-                with open(json_result_path, "w+", encoding="utf-8") as json_file:
-                    json.dump(result_json, json_file, ensure_ascii=False, indent=2)
-        
             # Save the total time taken for processing the PDF
-            result_json["total_time"] = round(total_times, 2)
-
-            with open(json_result_path, "w+", encoding="utf-8") as json_file:
-                json.dump(result_json, json_file, ensure_ascii=False, indent=2, allow_nan=False)
+            writer.finalize({"total_time": round(total_times, 2), **pass_stats})
 
         # Remove temp PDF files
         for f in result_dir.glob("*.pdf"):
             f.unlink()
-        shutil.rmtree(temp_image_dir, ignore_errors=True)
 
         yield logging_process(
             "success",
-            f"Finished processing PDF: {base_name}"
+            f"Finished processing PDF: {base_name} "
+            f"({pass_stats['double_pass_avoided']} OCR double passes avoided)"
         )
 
     except Exception as e:
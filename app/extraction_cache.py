@@ -0,0 +1,223 @@
+"""Content-addressed cache of extracted pages, shared by both extraction pipelines.
+
+Page records are keyed by the SHA-256 of the PDF bytes, the page number and a
+hash of the pipeline configuration (method, YOLO weights, OCR options), so the
+same document downloaded under several ids is only extracted once. Records
+live in a SQLite file that is shared by the worker processes of a batch run;
+once it grows beyond its size limit the least recently used pages are evicted.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+CACHE_PATH = Path("app/cache/extraction_cache.sqlite")
+CACHE_MAX_BYTES = 2 * 1024**3
+CACHE_VERSION = 3  # Bump when a pipeline change makes cached pages stale
+EVICT_TARGET = 0.9  # Eviction frees space down to this share of the limit
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def file_sha256(path: str | Path, chunk_size: int = 1 << 20):
+    """Computes the SHA-256 hex digest of a file, reading it in chunks."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def config_hash(method: str, **options):
+    """
+    Hashes the pipeline configuration a cached page was extracted with.
+
+    Args:
+        method (str): The extraction method.
+        **options: Everything else that changes the extracted text, e.g. the
+            YOLO weights hash and OCR settings. Values must be JSON serializable.
+
+    Returns:
+        str: Hex digest identifying the configuration.
+    """
+    config = {"version": CACHE_VERSION, "method": method, **options}
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """
+    SQLite store of page records with a size limit and LRU eviction.
+
+    Args:
+        path (str | Path): The SQLite file.
+        max_bytes (int): Size limit of the stored records.
+    """
+
+    def __init__(self, path: str | Path = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        # WAL lets the workers of a batch run read while another one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                doc_hash TEXT NOT NULL,
+                config TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                record TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (doc_hash, config, page)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+        self._conn.commit()
+        self._size = self._total_size()
+        self._stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def _total_size(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def get_pages(self, doc_hash: str, config: str, pages):
+        """
+        Looks up cached records of a document.
+
+        Args:
+            doc_hash (str): SHA-256 of the PDF.
+            config (str): Result of `config_hash`.
+            pages (Iterable[int]): 1-based page numbers to look up.
+
+        Returns:
+            dict: Page number mapped to its record, for the pages found.
+        """
+        pages = list(pages)
+        if not pages:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page, record FROM pages WHERE doc_hash = ? AND config = ?",
+                (doc_hash, config),
+            ).fetchall()
+            wanted = set(pages)
+            found = {page: json.loads(record) for page, record in rows if page in wanted}
+            if found:
+                self._conn.executemany(
+                    "UPDATE pages SET last_used = ? WHERE doc_hash = ? AND config = ? AND page = ?",
+                    [(time.time(), doc_hash, config, page) for page in found],
+                )
+                self._conn.commit()
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(wanted) - len(found)
+        return found
+
+    def put_page(self, doc_hash: str, config: str, page: int, record: dict):
+        """Stores the record of a page, evicting old pages if the cache is full."""
+        data = json.dumps(record, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (doc_hash, config, page, data, size, time.time()),
+            )
+            self._conn.commit()
+            self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Other processes write to the same file, so start from the real size
+        self._size = self._total_size()
+        excess = self._size - int(self.max_bytes * EVICT_TARGET)
+        if excess <= 0:
+            return
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT rowid, size FROM pages ORDER BY last_used"
+        ):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM pages WHERE rowid = ?", victims)
+        self._conn.commit()
+        self._stats["evicted"] += len(victims)
+        self._size = self._total_size()
+
+    def stats(self):
+        """
+        Gets the counters of this process.
+
+        Returns:
+            dict: Page hits, misses and evictions, plus stored pages and bytes.
+        """
+        with self._lock:
+            pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            return {**self._stats, "pages": pages, "bytes": self._size}
+
+    def clear(self):
+        """Removes all cached pages."""
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_extraction_cache(path: str | Path = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+    """
+    Gets the process-wide cache for `path`, opening it on first use.
+
+    Args:
+        path (str | Path): The SQLite file.
+        max_bytes (int): Size limit of the stored records.
+
+    Returns:
+        ExtractionCache: The shared cache instance.
+    """
+    key = str(Path(path).resolve())
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = ExtractionCache(path, max_bytes)
+            _caches[key] = cache
+        return cache
+
+
+def iter_with_cached_pages(items, cached: dict):
+    """
+    Merges cached page records into the stream of a pipeline, in page order.
+
+    Args:
+        items (Iterable): Status dicts and `(page_number, record)` tuples of the
+            pages that were not cached, with 0-based page numbers in page order.
+        cached (dict): 1-based page number mapped to its cached record.
+
+    Yields:
+        Status dicts unchanged, and `(page_number, record, from_cache)` tuples.
+    """
+    cached_pages = sorted(cached)
+    index = 0
+    for item in items:
+        if isinstance(item, dict):
+            yield item
+            continue
+        page_number, record = item
+        while index < len(cached_pages) and cached_pages[index] <= page_number:
+            yield cached_pages[index] - 1, cached[cached_pages[index]], True
+            index += 1
+        yield page_number, record, False
+
+    for page in cached_pages[index:]:
+        yield page - 1, cached[page], True
@@ -1,10 +1,12 @@
 """This is a helper module for processing PDF such as logging and checking"""
 
 import os
-import json
 from pathlib import Path
 from typing import Any
 
+from result_index import STATUS_COMPLETE, get_result_index
+from result_writer import jsonl_path_for, load_result
+
 def logging_process(status: str, message: str):
     """Logs the process status and message.
 
@@ -21,7 +23,10 @@ def logging_process(status: str, message: str):
     }
 
 def check_json_file_exists(file_path: Any | Path):
-    """Checks if a JSON file exists and is have content.
+    """Checks if a JSON result (or its JSONL sidecar) exists and is complete.
+
+    The completion index answers without reading the file; results missing
+    from the index are parsed once and then recorded in it.
 
     Args:
         file_path (str): The path to the JSON file.
@@ -29,10 +34,20 @@ def check_json_file_exists(file_path: Any | Path):
     Returns:
         bool: True if the file exists and has content, False otherwise.
     """
-    if file_path.exists():
-        json_content = json.loads(file_path.read_text(encoding="utf-8"))
+    file_path = Path(file_path)
+    if not file_path.exists() and not jsonl_path_for(file_path).exists():
+        return False
+
+    index = get_result_index()
+    entry = index.get(file_path)
+    if entry is not None:
+        return entry["status"] == STATUS_COMPLETE
+
+    json_content = load_result(file_path)
+    if json_content is not None:
         total_pages = json_content.get("total_page", 0) or 0
         total_page_extracted = len(json_content.get("content", [])) or 0
         if total_pages == total_page_extracted:
+            index.mark_complete(file_path, total_pages)
             return True
-    return False
\ No newline at end of file
+    return False
@@ -0,0 +1,198 @@
+"""Pooled HTTP session, per-host rate limiting and conditional requests for the PDF downloader.
+
+The ETag, Last-Modified and size a server sent for a file are kept in a
+sidecar, so a later run can ask for the file only if it changed, or continue
+an interrupted transfer with a Range request.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+DEFAULT_POOL_SIZE = 16
+DEFAULT_PER_HOST = 2  # Concurrent requests per host
+DEFAULT_RATE_PER_HOST = 1.0  # Requests per second per host, on average
+DEFAULT_BURST = 2  # Requests a host may receive back to back
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE):
+    """
+    Creates a session whose connection pools are large enough for `pool_size`
+    threads, so concurrent downloads reuse connections instead of opening new ones.
+
+    Args:
+        pool_size (int): Connections kept per host, and number of host pools.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` acquisitions per second with bursts of `capacity`.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of stored tokens.
+    """
+
+    def __init__(self, rate: float, capacity: float = DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and takes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostLimiter:
+    """
+    Limits the concurrency and request rate per host.
+
+    Args:
+        per_host (int): Concurrent requests per host.
+        rate_per_host (float | None): Requests per second per host, None for no limit.
+        burst (float): Requests a host may receive back to back.
+    """
+
+    def __init__(
+        self,
+        per_host: int = DEFAULT_PER_HOST,
+        rate_per_host: float | None = DEFAULT_RATE_PER_HOST,
+        burst: float = DEFAULT_BURST,
+    ):
+        self.per_host = max(1, int(per_host))
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            limits = self._hosts.get(host)
+            if limits is None:
+                bucket = TokenBucket(self.rate_per_host, self.burst) if self.rate_per_host else None
+                limits = (threading.Semaphore(self.per_host), bucket)
+                self._hosts[host] = limits
+            return limits
+
+    @contextmanager
+    def slot(self, url: str):
+        """Holds one of the request slots of the host of `url`."""
+        semaphore, bucket = self._host(url)
+        with semaphore:
+            if bucket is not None:
+                bucket.acquire()
+            yield
+
+
+def _metadata_path(path: Path):
+    return path.parent.with_name(f"{path.parent.name}_http") / f"{path.name}.json"
+
+
+def load_http_metadata(path: str | Path, url: str):
+    """
+    Gets the validators stored for a downloaded file.
+
+    Args:
+        path (str | Path): The downloaded file.
+        url (str): The URL it is downloaded from; metadata of another URL is ignored.
+
+    Returns:
+        dict | None: "etag", "last_modified" and "size", or None if unknown.
+    """
+    try:
+        metadata = json.loads(_metadata_path(Path(path)).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if metadata.get("url") != url:
+        return None
+    return metadata
+
+
+def save_http_metadata(
+    path: str | Path, url: str, etag: str | None, last_modified: str | None, size: int | None
+):
+    """Stores the ETag, Last-Modified and size a server sent for a file."""
+    metadata_path = _metadata_path(Path(path))
+    metadata_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = metadata_path.with_suffix(".tmp")
+    temp_path.write_text(
+        json.dumps({
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": size,
+        }),
+        encoding="utf-8",
+    )
+    os.replace(temp_path, metadata_path)
+
+
+def forget_http_metadata(path: str | Path):
+    """Removes the stored validators of a file."""
+    _metadata_path(Path(path)).unlink(missing_ok=True)
+
+
+def conditional_headers(metadata: dict | None):
+    """Headers asking the server to answer 304 if the file did not change."""
+    headers = {}
+    if metadata:
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+    return headers
+
+
+def resume_headers(metadata: dict | None, offset: int):
+    """
+    Headers requesting the rest of a file from `offset`, as long as it is unchanged.
+
+    Returns:
+        dict: The Range and If-Range headers, or no headers if the file has no
+        validator, as a range of a changed file would corrupt it.
+    """
+    validator = metadata and (metadata.get("etag") or metadata.get("last_modified"))
+    if not validator or offset <= 0:
+        return {}
+    return {"Range": f"bytes={offset}-", "If-Range": validator}
+
+
+def content_range_total(content_range: str | None):
+    """Total size from a `Content-Range: bytes start-end/total` header, if known."""
+    match = re.match(r"bytes \d+-\d+/(\d+)", content_range or "")
+    return int(match.group(1)) if match else None
@@ -0,0 +1,200 @@
+"""Downloads a dataset and extracts its PDFs at the same time.
+
+A download thread feeds every PDF that arrives into a bounded backlog, which
+the extraction consumes in download order. When the extraction falls behind
+and the backlog is full (by count or by size on disk), the download thread
+blocks, so the downloads cannot fill up the disk.
+"""
+
+import os
+import queue
+import threading
+from pathlib import Path
+
+from helper import logging_process
+from pdf_process import DEFAULT_DOWNLOAD_WORKERS, handle_pdf_download_from_dataset
+from scheduler import METHOD_DOCLING
+
+DEFAULT_MAX_PENDING = 8  # Downloaded PDFs waiting for extraction
+DEFAULT_MAX_PENDING_BYTES = 2 * 1024**3
+DOWNLOAD_JOIN_TIMEOUT = 5.0  # Seconds to wait for the download thread when stopping
+
+STAGE_DOWNLOAD = "download"
+STAGE_PROCESS = "process"
+
+
+class _Backlog:
+    """Bounded list of downloaded PDFs, limited by count and by total size."""
+
+    def __init__(self, max_items, max_bytes):
+        self.max_items = max(1, int(max_items))
+        self.max_bytes = max_bytes
+        self._items = []
+        self._bytes = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def put(self, path, stop):
+        size = os.path.getsize(path)
+        with self._condition:
+            # An empty backlog always takes the next PDF, even an oversized one
+            while self._items and (
+                len(self._items) >= self.max_items or self._bytes + size > self.max_bytes
+            ):
+                if stop.is_set():
+                    return
+                self._condition.wait(timeout=0.1)
+            self._items.append((path, size))
+            self._bytes += size
+            self._condition.notify_all()
+
+    def get(self, timeout):
+        """Takes the oldest PDF, or returns None if none arrived within `timeout`."""
+        with self._condition:
+            if not self._items and not self._closed:
+                self._condition.wait(timeout=timeout)
+            if not self._items:
+                return None
+            path, _ = self._items[0]
+            return path
+
+    def done(self, path):
+        """Releases the space of a PDF taken with `get` once it is extracted."""
+        with self._condition:
+            for position, (item_path, size) in enumerate(self._items):
+                if item_path == path:
+                    del self._items[position]
+                    self._bytes -= size
+                    break
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def drained(self):
+        with self._condition:
+            return self._closed and not self._items
+
+
+def _process(method, pdf_path, options):
+    if method == METHOD_DOCLING:
+        from export_results import process_pdf
+
+        return process_pdf(pdf_path, **options)
+
+    from Pymu_Tesseract_Finetuned import process_pdf_pymu_tesseract
+
+    return process_pdf_pymu_tesseract(pdf_path, **options)
+
+
+def ingest_dataset(
+    dataset_file,
+    id_col: str,
+    url_col: str,
+    method: str,
+    download_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    max_pending: int = DEFAULT_MAX_PENDING,
+    max_pending_bytes: int = DEFAULT_MAX_PENDING_BYTES,
+    should_cancel=None,
+    **options,
+):
+    """
+    Downloads the PDFs of a dataset and extracts each one as soon as it arrives.
+
+    Args:
+        dataset_file (str | Path | pd.DataFrame): The dataset, see
+            `handle_pdf_download_from_dataset`.
+        id_col (str): Column name for the ID.
+        url_col (str): Column name for the URL.
+        method (str): METHOD_DOCLING or METHOD_PYMU_TESSERACT.
+        download_workers (int): Number of download threads.
+        max_pending (int): Downloaded PDFs allowed to wait for extraction.
+        max_pending_bytes (int): Total size of the PDFs waiting for extraction.
+        should_cancel (callable | None): Polled between pages; returning True
+            stops the downloads and the extraction.
+        **options: Keyword arguments for `process_pdf` / `process_pdf_pymu_tesseract`.
+
+    Yields:
+        dict: The status dicts of the downloads and of the extraction, with a
+        "stage" key ("download" or "process") and, for the extraction, the PDF
+        "file" name.
+    """
+    events = queue.Queue()
+    backlog = _Backlog(max_pending, max_pending_bytes)
+    stop = threading.Event()
+
+    def download():
+        downloads = handle_pdf_download_from_dataset(
+            dataset_file, id_col, url_col, workers=download_workers
+        )
+        try:
+            for status in downloads:
+                events.put({**status, "stage": STAGE_DOWNLOAD})
+                if stop.is_set():
+                    break
+                if status.get("status") in ("success", "info") and status.get("path"):
+                    backlog.put(status["path"], stop)
+        except Exception as e:
+            events.put({
+                **logging_process("error", f"Downloading the dataset failed: {e}"),
+                "stage": STAGE_DOWNLOAD,
+            })
+        finally:
+            downloads.close()
+            backlog.close()
+
+    def drain_events():
+        while True:
+            try:
+                yield events.get_nowait()
+            except queue.Empty:
+                return
+
+    def canceled():
+        if should_cancel is not None and not stop.is_set() and should_cancel():
+            stop.set()
+        return stop.is_set()
+
+    downloader = threading.Thread(target=download, daemon=True)
+    downloader.start()
+    try:
+        while not backlog.drained and not canceled():
+            yield from drain_events()
+            pdf_path = backlog.get(timeout=0.2)
+            if pdf_path is None:
+                continue
+
+            file_name = Path(pdf_path).name
+            logs = _process(method, pdf_path, options)
+            try:
+                for log in logs:
+                    yield {**log, "file": file_name, "stage": STAGE_PROCESS}
+                    yield from drain_events()
+                    if canceled():
+                        yield {
+                            **logging_process("info", f"Processing of {file_name} canceled."),
+                            "file": file_name,
+                            "stage": STAGE_PROCESS,
+                        }
+                        break
+            except Exception as e:
+                yield {
+                    **logging_process("error", f"Failed to process PDF {file_name}: {e}"),
+                    "file": file_name,
+                    "stage": STAGE_PROCESS,
+                }
+            finally:
+                logs.close()
+                backlog.done(pdf_path)
+
+        stop.set()
+        # A canceled run does not wait for downloads still in flight, the
+        # daemon thread finishes them (or dies with the process) on its own
+        downloader.join(timeout=DOWNLOAD_JOIN_TIMEOUT)
+        yield from drain_events()
+    finally:
+        # Also reached when the caller stops iterating (e.g. a Streamlit rerun)
+        stop.set()
@@ -0,0 +1,56 @@
+"""Garbage collection driven by memory pressure instead of by page count.
+
+Page buffers and pixmaps are freed by reference counting as soon as the last
+reference goes away, so a full `gc.collect()` only helps with reference cycles
+(e.g. inside PyTorch or Docling objects). With those objects in the heap a
+collection takes tens of milliseconds, so it is only run once the resident set
+size of the process crosses a threshold.
+"""
+
+import gc
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - optional dependency
+    psutil = None
+
+RSS_COLLECT_THRESHOLD = 4 * 1024**3  # Collect once the process is above this RSS
+RSS_COLLECT_STEP = 512 * 1024**2  # Growth needed after a collection to collect again
+
+
+class MemoryGuard:
+    """
+    Runs a garbage collection when the RSS of the process gets too high.
+
+    Without psutil, or with `threshold` set to None, `check` never collects.
+
+    Args:
+        threshold (int | None): RSS in bytes above which a collection runs.
+        step (int): Bytes the RSS must grow after a collection before the next
+            one, so memory that is legitimately held does not trigger a
+            collection on every page.
+    """
+
+    def __init__(self, threshold: int | None = RSS_COLLECT_THRESHOLD, step: int = RSS_COLLECT_STEP):
+        self.threshold = threshold
+        self.step = step
+        self.collections = 0
+        self._process = psutil.Process() if psutil is not None and threshold else None
+        self._next_rss = threshold
+
+    def check(self):
+        """
+        Collects garbage if the RSS is above the current limit.
+
+        Returns:
+            bool: Whether a collection ran.
+        """
+        if self._process is None:
+            return False
+        if self._process.memory_info().rss < self._next_rss:
+            return False
+
+        gc.collect()
+        self.collections += 1
+        self._next_rss = max(self.threshold, self._process.memory_info().rss + self.step)
+        return True
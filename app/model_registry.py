@@ -0,0 +1,144 @@
+"""Process-wide registry for the YOLO models shared by both extraction pipelines."""
+
+import hashlib
+import os
+import threading
+import time
+from glob import glob
+from pathlib import Path
+
+from ultralytics import YOLO
+
+YOLO_DIR = Path("app/yolo")
+
+_lock = threading.Lock()
+_latest_path_cache = {}
+_weights_hashes = {}
+_models = {}
+_stats = {
+    "loads": 0,
+    "hits": 0,
+    "load_time": 0.0,
+}
+
+
+def get_latest_yolo_model_path(yolo_dir=YOLO_DIR):
+    """
+    Get the latest YOLO model file from the specified directory.
+    Args:
+        yolo_dir (str): Directory where YOLO model files are stored.
+    Returns:
+        Path: Path to the latest YOLO model file.
+    Raises:
+        FileNotFoundError: If no YOLO model files are found in the specified directory.
+    """
+    yolo_dir = Path(yolo_dir)
+    try:
+        dir_mtime = os.stat(yolo_dir).st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"YOLO model file not found at {yolo_dir}/")
+
+    # A new .pt landing in the directory changes its mtime, so the glob + sort
+    # only has to run again when the directory content actually changed.
+    cached = _latest_path_cache.get(str(yolo_dir))
+    if cached and cached[0] == dir_mtime and cached[1].exists():
+        return cached[1]
+
+    yolo_files = sorted(
+        glob(str(yolo_dir / "*.pt")),
+        key=lambda f: os.path.getmtime(f),
+        reverse=True,
+    )
+    if not yolo_files:
+        raise FileNotFoundError(f"YOLO model file not found at {yolo_dir}/")
+    latest = Path(yolo_files[0])
+    _latest_path_cache[str(yolo_dir)] = (dir_mtime, latest)
+    return latest
+
+
+def get_yolo_model(yolo_dir=YOLO_DIR):
+    """
+    Get the YOLO model for the latest weights in `yolo_dir`, loading it only once.
+
+    The model is keyed by weight path and modification time, so it is reloaded
+    only when newer weights are dropped into the directory (or the current file
+    is overwritten).
+
+    Args:
+        yolo_dir (str | Path): Directory where YOLO model files are stored.
+
+    Returns:
+        YOLO: The loaded YOLO model.
+    """
+    model_path = get_latest_yolo_model_path(yolo_dir)
+    key = (str(model_path.resolve()), os.path.getmtime(model_path))
+
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            _stats["hits"] += 1
+            return model
+
+        start_time = time.perf_counter()
+        model = YOLO(str(model_path))
+        _stats["load_time"] += time.perf_counter() - start_time
+        _stats["loads"] += 1
+
+        # Drop models loaded from older weights of the same directory
+        for old_key in [k for k in _models if Path(k[0]).parent == Path(key[0]).parent]:
+            del _models[old_key]
+        _models[key] = model
+        return model
+
+
+def get_yolo_weights_hash(yolo_dir=YOLO_DIR):
+    """
+    Get the SHA-256 of the latest YOLO weights in `yolo_dir`.
+
+    The hash is computed once per weight path and modification time.
+
+    Args:
+        yolo_dir (str | Path): Directory where YOLO model files are stored.
+
+    Returns:
+        str: Hex digest of the weight file.
+    """
+    model_path = get_latest_yolo_model_path(yolo_dir)
+    key = (str(model_path.resolve()), os.path.getmtime(model_path))
+
+    with _lock:
+        digest = _weights_hashes.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(model_path, "rb") as weights:
+                for chunk in iter(lambda: weights.read(1 << 20), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            _weights_hashes[key] = digest
+        return digest
+
+
+def get_yolo_model_stats():
+    """
+    Get the load-time and hit counters of the YOLO model registry.
+
+    Returns:
+        dict: Number of loads, cache hits, total load time in seconds and the
+        weight files currently held in memory.
+    """
+    with _lock:
+        return {
+            "loads": _stats["loads"],
+            "hits": _stats["hits"],
+            "load_time": round(_stats["load_time"], 2),
+            "models": [path for path, _ in _models],
+        }
+
+
+def clear_yolo_models():
+    """Release all loaded YOLO models and reset the registry counters."""
+    with _lock:
+        _models.clear()
+        _latest_path_cache.clear()
+        _weights_hashes.clear()
+        _stats.update(loads=0, hits=0, load_time=0.0)
@@ -0,0 +1,147 @@
+"""OCR backends for the PyMuPDF + Tesseract pipeline.
+
+`TesserocrBackend` keeps one Tesseract engine loaded per thread through the C
+API, so the `eng+id` traineddata is only read once per worker. When tesserocr
+is not installed (or cannot load the languages) `PytesseractBackend` is used,
+which spawns a `tesseract` process per call.
+"""
+
+import atexit
+import threading
+
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # pragma: no cover - optional dependency
+    tesserocr = None
+
+OCR_LANG = "eng+id"
+OCR_OEM = 3  # Default, based on what is available
+OCR_PSM = 4  # Assume a single column of text of variable sizes
+
+
+def _summarize(words, confidences):
+    avg_confidence = round(sum(confidences) / len(confidences), 2) if confidences else 0.0
+    text = " ".join(word for word in words if word.strip() != "")
+    return text, avg_confidence
+
+
+class PytesseractBackend:
+    """Runs the `tesseract` CLI through pytesseract, one process per call."""
+
+    name = "pytesseract"
+
+    def __init__(self, lang=OCR_LANG, oem=OCR_OEM, psm=OCR_PSM):
+        self.lang = lang
+        self.config = f"--oem {oem} --psm {psm}"
+
+    def extract(self, image):
+        """
+        Extracts text and the average word confidence from an image.
+
+        Args:
+            image (PIL.Image.Image | np.ndarray): Image to read.
+
+        Returns:
+            tuple: (text, avg_confidence)
+        """
+        data = pytesseract.image_to_data(
+            image, config=self.config, lang=self.lang, output_type=pytesseract.Output.DICT
+        )
+        confidences = [conf for conf in data["conf"] if conf != -1]
+        words = [
+            data["text"][i]
+            for i in range(len(data["text"]))
+            if data["conf"][i] != -1
+        ]
+        return _summarize(words, confidences)
+
+
+class TesserocrBackend:
+    """Keeps one in-process Tesseract engine per thread through tesserocr."""
+
+    name = "tesserocr"
+
+    def __init__(self, lang=OCR_LANG, oem=OCR_OEM, psm=OCR_PSM):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self.lang = lang
+        self.oem = oem
+        self.psm = psm
+        self._local = threading.local()
+        self._apis = []
+        self._lock = threading.Lock()
+        # Fail early (e.g. missing traineddata) so the caller can fall back
+        self._get_api()
+        atexit.register(self.close)
+
+    def _get_api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(
+                lang=self.lang,
+                oem=tesserocr.OEM(self.oem),
+                psm=tesserocr.PSM(self.psm),
+            )
+            self._local.api = api
+            with self._lock:
+                self._apis.append(api)
+        return api
+
+    def extract(self, image):
+        """
+        Extracts text and the average word confidence from an image.
+
+        Args:
+            image (PIL.Image.Image): Image to read.
+
+        Returns:
+            tuple: (text, avg_confidence)
+        """
+        api = self._get_api()
+        api.SetImage(image)
+        api.Recognize()
+
+        words, confidences = [], []
+        iterator = api.GetIterator()
+        level = tesserocr.RIL.WORD
+        if iterator is not None:
+            for word in tesserocr.iterate_level(iterator, level):
+                text = word.GetUTF8Text(level)
+                if text is None:
+                    continue
+                words.append(text)
+                confidences.append(word.Confidence(level))
+        api.Clear()
+
+        return _summarize(words, confidences)
+
+    def close(self):
+        """Releases the Tesseract engines of all threads."""
+        with self._lock:
+            for api in self._apis:
+                api.End()
+            self._apis.clear()
+        self._local = threading.local()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_ocr_backend():
+    """
+    Gets the process-wide OCR backend, preferring the in-process tesserocr engine.
+
+    Returns:
+        TesserocrBackend | PytesseractBackend: The OCR backend.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            try:
+                _backend = TesserocrBackend()
+            except RuntimeError:
+                _backend = PytesseractBackend()
+        return _backend
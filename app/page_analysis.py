@@ -0,0 +1,83 @@
+"""Cheap per-page checks deciding whether a page needs OCR."""
+
+import pymupdf
+
+# Thresholds of the page classifier
+MIN_TEXT_CHARS = 50  # Fewer visible characters than this is not a usable text layer
+MIN_TEXT_COVERAGE = 0.02  # Share of the page area covered by text blocks
+MAX_IMAGE_COVERAGE = 0.5  # Larger shares of images point to a scanned page
+INVISIBLE_TEXT_ALPHA = 0  # Span alpha of OCR layers rendered invisibly
+
+PAGE_DIGITAL = "digital"
+PAGE_SCANNED = "scanned"
+PAGE_MIXED = "mixed"
+
+
+def _covered_area(rects, page_rect):
+    """Sums the area of `rects` clipped to the page, as a share of the page area."""
+    page_area = abs(page_rect) or 1.0
+    area = sum(abs(pymupdf.Rect(rect) & page_rect) for rect in rects)
+    return min(area / page_area, 1.0)
+
+
+def classify_page(page: pymupdf.Page):
+    """
+    Classifies a page by its text layer, fonts and image coverage.
+
+    - "digital": a visible text layer with fonts and little image area, the
+      text can be read directly from the PDF.
+    - "scanned": no usable text layer, the page has to be OCR'd.
+    - "mixed": a text layer next to large images (or an invisible OCR layer),
+      the page is OCR'd to also read the text inside the images.
+
+    Args:
+        page (pymupdf.Page): The page to classify.
+
+    Returns:
+        dict: The "page_type" and the measurements it was derived from.
+    """
+    page_rect = page.rect
+    text_rects = []
+    visible_chars = 0
+    invisible_chars = 0
+
+    text_dict = page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)
+    for block in text_dict["blocks"]:
+        if block.get("type") != 0:
+            continue
+        block_chars = 0
+        for line in block["lines"]:
+            for span in line["spans"]:
+                chars = len(span["text"].strip())
+                if span.get("alpha", 255) == INVISIBLE_TEXT_ALPHA:
+                    invisible_chars += chars
+                else:
+                    block_chars += chars
+        if block_chars:
+            visible_chars += block_chars
+            text_rects.append(block["bbox"])
+
+    image_rects = [info["bbox"] for info in page.get_image_info()]
+    text_coverage = _covered_area(text_rects, page_rect)
+    image_coverage = _covered_area(image_rects, page_rect)
+    has_fonts = len(page.get_fonts()) > 0
+
+    has_text_layer = (
+        has_fonts
+        and visible_chars >= MIN_TEXT_CHARS
+        and text_coverage >= MIN_TEXT_COVERAGE
+    )
+    if not has_text_layer:
+        page_type = PAGE_SCANNED
+    elif image_coverage > MAX_IMAGE_COVERAGE or invisible_chars > visible_chars:
+        page_type = PAGE_MIXED
+    else:
+        page_type = PAGE_DIGITAL
+
+    return {
+        "page_type": page_type,
+        "text_chars": visible_chars,
+        "text_coverage": round(text_coverage, 3),
+        "image_coverage": round(image_coverage, 3),
+        "has_fonts": has_fonts,
+    }
@@ -0,0 +1,302 @@
+"""Pipelined page processing: MuPDF, detection and OCR stages connected by bounded queues.
+
+The MuPDF thread rasterizes page k+1 and the detection thread runs YOLO on
+it while the OCR pool still reads page k. MuPDF is not thread-safe, so page
+objects never leave the MuPDF thread: it loads and renders the pages and,
+once their boxes are detected, also does the redaction and table finding
+(`prepare`). YOLO and the OCR pool only get plain data (arrays, boxes and
+text) and run unlocked. The MuPDF calls still hold `MUPDF_LOCK` (see
+`page_render`), since the caller may use the document from its own thread.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from detection import DEFAULT_BATCH_SIZE, detect_batch
+from page_render import MUPDF_LOCK
+
+DEFAULT_QUEUE_DEPTH = 4
+DEFAULT_OCR_WORKERS = 2
+
+_DONE = object()
+
+
+class PagePipeline:
+    """
+    Runs pages of a document through render -> detect -> prepare -> extract stages.
+
+    Args:
+        doc (pymupdf.Document): The opened PDF document.
+        model (YOLO): Loaded YOLO model.
+        render (callable): Called with a page, returns `(payload, bgr_image)`.
+        prepare (callable): Called with `(page, payload, bounding_boxes)` on the
+            MuPDF thread, returns the plain data the OCR stage needs.
+        extract (callable): Called with `(payload, prepared)` in an OCR worker
+            thread, returns the page result.
+        batch_size (int): Maximum number of queued pages detected at once.
+        ocr_workers (int): Threads of the OCR stage.
+        queue_depth (int): Capacity of the queues between the stages.
+        conf (float): Minimum confidence of the detected boxes.
+    """
+
+    def __init__(
+        self,
+        doc,
+        model,
+        render,
+        prepare,
+        extract,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        ocr_workers: int = DEFAULT_OCR_WORKERS,
+        queue_depth: int = DEFAULT_QUEUE_DEPTH,
+        conf: float = 0.25,
+    ):
+        self.doc = doc
+        self.model = model
+        self.render = render
+        self.prepare = prepare
+        self.extract = extract
+        self.batch_size = max(1, int(batch_size))
+        self.ocr_workers = max(1, int(ocr_workers))
+        self.queue_depth = max(1, int(queue_depth))
+        self.conf = conf
+
+        self._render_queue = queue.Queue(maxsize=self.queue_depth)
+        self._detect_queue = queue.Queue(maxsize=self.queue_depth)
+        self._prepare_queue = queue.Queue(maxsize=self.queue_depth)
+        self._stop = threading.Event()
+        self._errors = []
+        self._stats_lock = threading.Lock()
+        self._busy = {"render": 0.0, "detect": 0.0, "prepare": 0.0, "ocr": 0.0}
+        self._depth = {
+            "render": {"max": 0, "total": 0, "samples": 0},
+            "detect": {"max": 0, "total": 0, "samples": 0},
+            "prepare": {"max": 0, "total": 0, "samples": 0},
+        }
+        self._wall_time = 0.0
+
+    def _record(self, stage, seconds):
+        with self._stats_lock:
+            self._busy[stage] += seconds
+
+    def _put(self, name, target, item):
+        while True:
+            if self._stop.is_set():
+                return
+            try:
+                target.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        depth = self._depth[name]
+        with self._stats_lock:
+            size = target.qsize()
+            depth["max"] = max(depth["max"], size)
+            depth["total"] += size
+            depth["samples"] += 1
+
+    def _get(self, source):
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _render_page(self, pages, page_number):
+        start_time = time.perf_counter()
+        with MUPDF_LOCK:
+            pages[page_number] = self.doc.load_page(page_number)
+            payload, image = self.render(pages[page_number])
+        render_secs = time.perf_counter() - start_time
+        self._record("render", render_secs)
+        self._put("render", self._render_queue, (page_number, payload, image, render_secs))
+
+    def _prepare_page(self, pages, page_number, payload, bounding_boxes, upstream_secs):
+        start_time = time.perf_counter()
+        with MUPDF_LOCK:
+            # The page is dropped while the lock is held, so MuPDF frees it there too
+            prepared = self.prepare(pages.pop(page_number), payload, bounding_boxes)
+        prepare_secs = time.perf_counter() - start_time
+        self._record("prepare", prepare_secs)
+        self._put(
+            "prepare",
+            self._prepare_queue,
+            (page_number, payload, prepared, upstream_secs + prepare_secs),
+        )
+
+    def _mupdf_stage(self, page_numbers):
+        pages = {}
+        to_render = deque(page_numbers)
+        render_done = False
+        try:
+            while not self._stop.is_set():
+                # Detected pages go first, so their page objects are released early.
+                # Only this thread fills the render queue, so a put never blocks here.
+                can_render = not render_done and not self._render_queue.full()
+                try:
+                    item = self._detect_queue.get(
+                        block=not can_render, timeout=0.1 if render_done else 0.01
+                    )
+                except queue.Empty:
+                    item = None
+
+                if item is _DONE:
+                    break
+                if item is not None:
+                    self._prepare_page(pages, *item)
+                elif can_render and to_render:
+                    self._render_page(pages, to_render.popleft())
+                elif can_render:
+                    self._put("render", self._render_queue, _DONE)
+                    render_done = True
+        except BaseException as error:
+            self._errors.append(error)
+        finally:
+            self._put("prepare", self._prepare_queue, _DONE)
+            if not render_done:
+                self._put("render", self._render_queue, _DONE)
+            with MUPDF_LOCK:
+                pages.clear()
+
+    def _detect_stage(self):
+        try:
+            done = False
+            while not done and not self._stop.is_set():
+                item = self._get(self._render_queue)
+                if item is _DONE:
+                    break
+                # Detect whatever is already rendered, up to batch_size pages
+                batch = [item]
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._render_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        done = True
+                        break
+                    batch.append(item)
+
+                start_time = time.perf_counter()
+                detections = detect_batch(self.model, [b[2] for b in batch], conf=self.conf)
+                detect_secs = time.perf_counter() - start_time
+                self._record("detect", detect_secs)
+
+                for (page_number, payload, _, render_secs), bounding_boxes in zip(batch, detections):
+                    self._put(
+                        "detect",
+                        self._detect_queue,
+                        (page_number, payload, bounding_boxes, render_secs + detect_secs / len(batch)),
+                    )
+                del batch
+        except BaseException as error:
+            self._errors.append(error)
+        finally:
+            self._put("detect", self._detect_queue, _DONE)
+
+    def _ocr_task(self, page_number, payload, prepared, upstream_secs):
+        start_time = time.perf_counter()
+        result = self.extract(payload, prepared)
+        ocr_secs = time.perf_counter() - start_time
+        self._record("ocr", ocr_secs)
+        return page_number, payload, result, upstream_secs + ocr_secs
+
+    def run(self, page_numbers=None):
+        """
+        Processes the pages and yields them in page order.
+
+        Args:
+            page_numbers (Iterable[int] | None): 0-based pages to process, all by default.
+
+        Yields:
+            tuple: `(page_number, payload, result, duration)` where duration is the time
+            spent on this page across all stages.
+        """
+        if page_numbers is None:
+            page_numbers = range(self.doc.page_count)
+        page_numbers = list(page_numbers)
+        start_time = time.perf_counter()
+
+        threads = [
+            threading.Thread(target=self._mupdf_stage, args=(page_numbers,), daemon=True),
+            threading.Thread(target=self._detect_stage, daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        pending = {}
+        input_done = False
+        try:
+            with ThreadPoolExecutor(max_workers=self.ocr_workers) as pool:
+                for page_number in page_numbers:
+                    # Keep the OCR pool fed with everything already prepared
+                    while not input_done and page_number not in pending:
+                        item = self._prepare_queue.get()
+                        if item is _DONE:
+                            input_done = True
+                            break
+                        pending[item[0]] = pool.submit(self._ocr_task, *item)
+                    while not input_done and len(pending) < self.ocr_workers + self.queue_depth:
+                        try:
+                            item = self._prepare_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is _DONE:
+                            input_done = True
+                            break
+                        pending[item[0]] = pool.submit(self._ocr_task, *item)
+
+                    if page_number not in pending:
+                        break
+                    yield pending.pop(page_number).result()
+
+                if self._errors:
+                    raise self._errors[0]
+        finally:
+            self._stop.set()
+            for pending_queue in (self._render_queue, self._detect_queue, self._prepare_queue):
+                while True:
+                    try:
+                        pending_queue.get_nowait()
+                    except queue.Empty:
+                        break
+            for thread in threads:
+                thread.join(timeout=5)
+            self._wall_time += time.perf_counter() - start_time
+
+    def stats(self):
+        """
+        Gets the per-stage busy time and queue depths, for tuning the pipeline.
+
+        Returns:
+            dict: Busy seconds and utilization per stage (OCR utilization is
+            relative to all OCR workers), plus max and mean depth of each queue.
+        """
+        with self._stats_lock:
+            wall_time = self._wall_time or 1e-9
+            stages = {
+                stage: {
+                    "busy_secs": round(busy, 2),
+                    "utilization": round(
+                        busy / wall_time / (self.ocr_workers if stage == "ocr" else 1), 2
+                    ),
+                }
+                for stage, busy in self._busy.items()
+            }
+            queues = {
+                name: {
+                    "capacity": self.queue_depth,
+                    "max_depth": depth["max"],
+                    "mean_depth": round(depth["total"] / depth["samples"], 2) if depth["samples"] else 0.0,
+                }
+                for name, depth in self._depth.items()
+            }
+            return {
+                "wall_secs": round(self._wall_time, 2),
+                "stages": stages,
+                "queues": queues,
+            }
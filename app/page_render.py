@@ -0,0 +1,216 @@
+"""Rendering helpers turning PDF pages into image buffers for detection and OCR.
+
+The render resolution is chosen per page: detection gets a lower DPI than OCR,
+scanned pages are not rendered above the resolution of their embedded scan,
+and every render is capped to MAX_PAGE_PIXELS so large formats stay bounded.
+OCR reads single-channel renders (optionally binarized), only YOLO gets RGB.
+Pixmaps only live inside the helpers that render them; page buffers that
+outlive a render can be recycled through a `BufferPool`.
+"""
+
+import math
+import threading
+
+import cv2
+import numpy as np
+import pymupdf
+
+# MuPDF is not thread-safe; threads sharing documents serialize their calls here
+MUPDF_LOCK = threading.RLock()
+
+OCR_DPI = 300  # Upper bound of the OCR render resolution
+MIN_OCR_DPI = 150  # Lower bound, even for low resolution scans
+DETECTION_DPI = 150  # YOLO resizes its input to 640 px anyway
+MAX_PAGE_PIXELS = 12_000_000  # About an A3 page at 250 DPI
+MIN_SCAN_COVERAGE = 0.5  # Share of the page an image must cover to count as the scan
+
+BINARIZE_OTSU = "otsu"  # One global threshold per page
+BINARIZE_ADAPTIVE = "adaptive"  # Local thresholds, for uneven lighting and stains
+ADAPTIVE_BLOCK_SIZE = 31  # Neighbourhood in pixels of the adaptive threshold
+ADAPTIVE_OFFSET = 15  # Subtracted from the local mean, keeps paper texture white
+POOL_MAX_IDLE = 2  # Released page buffers kept for reuse
+
+
+class BufferPool:
+    """
+    Reuses page-sized arrays between pages instead of allocating new ones.
+
+    Pages of a document usually share their size, so a released buffer fits
+    the next page. Safe to use from several threads.
+
+    Args:
+        max_idle (int): Released buffers kept for reuse, others are dropped.
+    """
+
+    def __init__(self, max_idle: int = POOL_MAX_IDLE):
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        """Gets an uninitialized array of the given shape, reused when possible."""
+        shape = tuple(shape)
+        with self._lock:
+            for position, buffer in enumerate(self._idle):
+                if buffer.shape == shape and buffer.dtype == dtype:
+                    return self._idle.pop(position)
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buffer):
+        """Hands back an array from `acquire` that is no longer referenced anywhere."""
+        if buffer is None:
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(buffer)
+
+
+def pixmap_to_array(pix: pymupdf.Pixmap):
+    """
+    Wraps the samples of a pixmap in a NumPy array without copying them.
+
+    The array is a view over the pixmap memory, so the pixmap must stay alive
+    for as long as the array is used.
+
+    Args:
+        pix (pymupdf.Pixmap): The rendered page.
+
+    Returns:
+        np.ndarray: Array of shape (height, width, channels), or (height, width)
+        for single-channel pixmaps.
+    """
+    array = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+    if pix.n == 1:
+        return array.reshape(pix.height, pix.width)
+    return array.reshape(pix.height, pix.width, pix.n)
+
+
+def pixmap_to_bgr(pix: pymupdf.Pixmap):
+    """
+    Converts an RGB pixmap into the BGR array layout expected by YOLO.
+
+    Args:
+        pix (pymupdf.Pixmap): The rendered page.
+
+    Returns:
+        np.ndarray: BGR image of shape (height, width, 3).
+    """
+    return cv2.cvtColor(pixmap_to_array(pix), cv2.COLOR_RGB2BGR)
+
+
+def render_page(page: pymupdf.Page, zoom: float):
+    """
+    Renders a page at the given zoom factor.
+
+    Args:
+        page (pymupdf.Page): The page to render.
+        zoom (float): Zoom factor relative to 72 DPI.
+
+    Returns:
+        pymupdf.Pixmap: The rendered RGB pixmap.
+    """
+    return page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom))
+
+
+def render_page_gray(page: pymupdf.Page, zoom: float):
+    """
+    Renders a page straight into a single-channel (grayscale) pixmap.
+
+    Args:
+        page (pymupdf.Page): The page to render.
+        zoom (float): Zoom factor relative to 72 DPI.
+
+    Returns:
+        pymupdf.Pixmap: The rendered grayscale pixmap.
+    """
+    return page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), colorspace=pymupdf.csGRAY)
+
+
+def binarize_image(gray: np.ndarray, method: str, out: np.ndarray | None = None):
+    """
+    Turns a grayscale image into black ink on a white background.
+
+    Args:
+        gray (np.ndarray): Single-channel image.
+        method (str): BINARIZE_OTSU or BINARIZE_ADAPTIVE.
+        out (np.ndarray | None): Array of the same shape receiving the result.
+
+    Returns:
+        np.ndarray: Image holding only the values 0 and 255, `out` if given.
+    """
+    if method == BINARIZE_OTSU:
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=out)
+        return binary
+    if method == BINARIZE_ADAPTIVE:
+        return cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+            ADAPTIVE_BLOCK_SIZE, ADAPTIVE_OFFSET, dst=out,
+        )
+    raise ValueError(f"Unknown binarization method: {method}")
+
+
+def embedded_image_dpi(page: pymupdf.Page, min_coverage: float = MIN_SCAN_COVERAGE):
+    """
+    Estimates the resolution of the scan embedded in a page.
+
+    Only images covering at least `min_coverage` of the page are considered,
+    so logos and figures do not count.
+
+    Args:
+        page (pymupdf.Page): The page to inspect.
+        min_coverage (float): Minimum share of the page area covered by the image.
+
+    Returns:
+        float | None: Effective DPI of the largest scan at its displayed size,
+        or None if the page holds no such image.
+    """
+    page_area = abs(page.rect)
+    if not page_area:
+        return None
+
+    best_dpi = None
+    for info in page.get_image_info():
+        bbox = pymupdf.Rect(info["bbox"])
+        if abs(bbox) < min_coverage * page_area or not info.get("width") or not info.get("height"):
+            continue
+        # The image pixels spread over its displayed size in points (1/72 inch)
+        dpi = min(info["width"] * 72 / bbox.width, info["height"] * 72 / bbox.height)
+        best_dpi = dpi if best_dpi is None else max(best_dpi, dpi)
+    return best_dpi
+
+
+def cap_dpi(page: pymupdf.Page, dpi: float, max_pixels: int = MAX_PAGE_PIXELS):
+    """Lowers `dpi` so the rendered page has at most `max_pixels` pixels."""
+    width_in, height_in = page.rect.width / 72, page.rect.height / 72
+    if width_in <= 0 or height_in <= 0:
+        return dpi
+    return min(dpi, math.sqrt(max_pixels / (width_in * height_in)))
+
+
+def choose_ocr_dpi(
+    page: pymupdf.Page,
+    max_dpi: float = OCR_DPI,
+    min_dpi: float = MIN_OCR_DPI,
+    max_pixels: int = MAX_PAGE_PIXELS,
+):
+    """
+    Chooses the DPI at which a page is rendered for OCR.
+
+    Scanned pages are rendered at the resolution of their scan, clamped to
+    [`min_dpi`, `max_dpi`], as upsampling adds no detail. Other pages use
+    `max_dpi`. The result is capped to `max_pixels`.
+
+    Returns:
+        float: The render DPI.
+    """
+    source_dpi = embedded_image_dpi(page)
+    dpi = max_dpi if source_dpi is None else min(max_dpi, max(min_dpi, source_dpi))
+    return cap_dpi(page, dpi, max_pixels)
+
+
+def choose_detection_dpi(
+    page: pymupdf.Page, max_dpi: float = DETECTION_DPI, max_pixels: int = MAX_PAGE_PIXELS
+):
+    """Chooses the DPI at which a page is rendered for YOLO, capped to `max_pixels`."""
+    return cap_dpi(page, max_dpi, max_pixels)
+
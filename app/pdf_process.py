@@ -1,41 +1,74 @@
+import csv
 import os
 import shutil
 import time
 import random
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 import pymupdf
 import re
+from contextlib import nullcontext
 
 import pandas as pd
 import requests
 
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - optional dependency
+    openpyxl = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pq = None
+
 from urllib.parse import urlparse
 
+from http_client import (
+    DEFAULT_PER_HOST,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_RATE_PER_HOST,
+    HostLimiter,
+    conditional_headers,
+    content_range_total,
+    create_session,
+    forget_http_metadata,
+    load_http_metadata,
+    resume_headers,
+    save_http_metadata,
+)
+from pdf_validation import (
+    InvalidPDFError,
+    StreamValidator,
+    cached_validation,
+    check_content_type,
+    forget_validation,
+    record_validation,
+)
+
 # Constants
 TEMP_DIR_PDF = Path("app/temp/pdf")
 TEMP_DIR = Path("app/temp/")
 EXTENSION = {
     "csv": ".csv",
     "xlsx": [".xlsx", ".xls"],
+    "parquet": ".parquet",
 }
+DATASET_CHUNK_SIZE = 10_000  # Dataset rows read at a time
+DEFAULT_DOWNLOAD_WORKERS = 8
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0  # Seconds before the first retry, doubled on every attempt
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}  # HTTP errors worth retrying
 
-# Configure session
-session = requests.Session()
-session.headers.update({
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    )
-})
+# Configure session, shared by all download threads
+session = create_session(DEFAULT_POOL_SIZE)
 
 def is_pdf_valid_but_repaired(filename: str) -> bool:
     try:
-        doc = pymupdf.open(filename)
-        doc.load_page(0)
-        # Explicitly trigger MuPDF warnings if available
-        logs = pymupdf.TOOLS.mupdf_warnings()
-        doc.close()
+        with pymupdf.open(filename) as doc:
+            doc.load_page(0)
+            # Explicitly trigger MuPDF warnings if available
+            logs = pymupdf.TOOLS.mupdf_warnings()
     except Exception:
         return False  # File memang rusak dan gak bisa dibuka
 
@@ -48,28 +81,78 @@ def ensure_temp_dir(dir_name: str | Path = TEMP_DIR):
     """Ensure the temporary directory exists."""
     os.makedirs(dir_name, exist_ok=True)
 
-def download_pdf(id: str = None, url: str = None):
+def _partial_path(filename: Path):
+    """Temp path of a download, outside the PDF directory so it is never listed as a PDF."""
+    partial_dir = filename.parent.with_name(f"{filename.parent.name}_partial")
+    ensure_temp_dir(partial_dir)
+    return partial_dir / f"{filename.name}.part"
+
+
+def is_cached_pdf_valid(filename: Path) -> bool:
+    """Validity of an existing file, opening it with MuPDF only if it was not validated before."""
+    valid = cached_validation(filename)
+    if valid is None:
+        valid = is_pdf_valid_but_repaired(filename)
+        record_validation(
+            filename, valid, "" if valid else "MuPDF had to repair the file", checked_by="mupdf"
+        )
+    return valid
+
+
+def _retry_delay(attempt: int, backoff: float, response=None):
+    """Exponential backoff with jitter, or the server's Retry-After if it sent one."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+    return backoff * 2 ** (attempt - 1) + random.uniform(0, backoff)
+
+
+def _target_name(id, url):
+    """File name a PDF is saved under: its ID, or the last part of its URL path."""
+    if id:
+        return f"{id}.pdf"
+    return urlparse(url).path.split('/')[-1] if url else ""
+
+
+def download_pdf(
+    id: str = None,
+    url: str = None,
+    session: requests.Session = session,
+    limiter: HostLimiter | None = None,
+    output_dir: str | Path = TEMP_DIR_PDF,
+    max_retries: int = MAX_RETRIES,
+    backoff: float = RETRY_BACKOFF,
+    revalidate: bool = False,
+):
     """
     Download a PDF file from a URL and save it to TEMP_DIR.
-    Retries up to 3 times if download fails.
+    Retries up to `max_retries` times with exponential backoff if download fails.
+    An interrupted download is continued with a Range request where the server
+    supports it.
 
     Args:
         id (str, optional): The ID of the PDF file.
         url (str): The URL to download the PDF from.
+        session (requests.Session): Session used for the request.
+        limiter (HostLimiter | None): Per-host concurrency and rate limits.
+        output_dir (str | Path): Directory the PDF is saved to.
+        max_retries (int): Number of download attempts.
+        backoff (float): Seconds before the first retry, doubled on every attempt.
+        revalidate (bool): Ask the server whether an already downloaded file
+            changed (ETag / Last-Modified) instead of trusting it.
 
     Yields:
         str: Status message.
     """
-    ensure_temp_dir(TEMP_DIR_PDF)
+    output_dir = Path(output_dir)
+    ensure_temp_dir(output_dir)
     filename = ""
-    max_retries = 3
 
     for attempt in range(1, max_retries + 1):
         try:
-            if id:
-                filename = TEMP_DIR_PDF / f"{id}.pdf"
-            elif url:
-                filename = TEMP_DIR_PDF / f"{urlparse(url).path.split('/')[-1]}"
+            if id or url:
+                filename = output_dir / _target_name(id, url)
             else:
                 yield {
                     "status": "error",
@@ -79,89 +162,415 @@ def download_pdf(id: str = None, url: str = None):
                 }
                 return
 
+            headers = {}
             if os.path.exists(filename):
-                if not is_pdf_valid_but_repaired(filename):
+                if not is_cached_pdf_valid(filename):
                     os.remove(filename)
+                    forget_validation(filename)
                     continue  # Retry download
-                else:
+
+                metadata = load_http_metadata(filename, url) if revalidate else None
+                if metadata is None:
                     yield {
                         "status": "info",
                         "id": id,
                         "url": url,
                         "message": f"🟢 Using cached file for {filename.name}",
+                        "path": str(filename),
                     }
                     return
+                headers = conditional_headers(metadata)
+
+            # The file is checked while it streams in and only renamed into
+            # place once complete, so a PDF in the directory is always whole
+            part_path = _partial_path(filename)
+            if not headers and part_path.exists():
+                headers = resume_headers(
+                    load_http_metadata(part_path, url), part_path.stat().st_size
+                )
+
+            # Pacing per host replaces the fixed sleep after every download
+            with limiter.slot(url) if limiter is not None else nullcontext():
+                response = session.get(url, stream=True, timeout=30, headers=headers)
+                if response.status_code == 416:
+                    # The partial file does not fit the server's file, start over
+                    response.close()
+                    part_path.unlink(missing_ok=True)
+                    forget_http_metadata(part_path)
+                    response = session.get(url, stream=True, timeout=30)
+                with response:
+                    if response.status_code == 304:
+                        yield {
+                            "status": "info",
+                            "id": id,
+                            "url": url,
+                            "message": f"🟢 {filename.name} is unchanged, using cached file",
+                            "path": str(filename),
+                        }
+                        return
+                    response.raise_for_status()
+                    check_content_type(response.headers.get("Content-Type"))
+
+                    validator = StreamValidator()
+                    if response.status_code == 206:
+                        validator.resume(part_path)
+                        expected_size = content_range_total(response.headers.get("Content-Range"))
+                        part_metadata = load_http_metadata(part_path, url)
+                        etag, last_modified = part_metadata["etag"], part_metadata["last_modified"]
+                        mode = "ab"
+                    else:
+                        content_length = response.headers.get("Content-Length", "")
+                        # Compressed transfers are decoded, their length does not match
+                        expected_size = (
+                            int(content_length)
+                            if content_length.isdigit() and not response.headers.get("Content-Encoding")
+                            else None
+                        )
+                        mode = "wb"
+                        etag = response.headers.get("ETag")
+                        last_modified = response.headers.get("Last-Modified")
+                        save_http_metadata(part_path, url, etag, last_modified, expected_size)
+
+                    with open(part_path, mode) as file:
+                        for chunk in response.iter_content(chunk_size=8192):
+                            validator.feed(chunk)
+                            file.write(chunk)
+                    trailer_found = validator.finish(expected_size)
+
+            # All bytes arrived but the trailer is not at the end, MuPDF decides
+            if not trailer_found and not is_pdf_valid_but_repaired(part_path):
+                raise InvalidPDFError("Missing startxref/%%EOF trailer and MuPDF cannot read the file")
 
-            with session.get(url, stream=True, timeout=30) as response:
-                response.raise_for_status()
-                with open(filename, "wb") as file:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        file.write(chunk)
+            os.replace(part_path, filename)
+            save_http_metadata(filename, url, etag, last_modified, validator.size)
+            forget_http_metadata(part_path)
+            record_validation(filename, True, checked_by="stream" if trailer_found else "mupdf")
 
-            time.sleep(random.uniform(0.5, 2))  # Delay supaya gak disangka brute force
             yield {
                 "status": "success",
                 "id": id,
                 "url": url,
                 "message": f"✅ Downloaded {filename.name}",
+                "path": str(filename),
+            }
+            return
+        except InvalidPDFError as e:
+            if not e.retryable:
+                part_path.unlink(missing_ok=True)
+                forget_http_metadata(part_path)
+            if e.retryable and attempt < max_retries:
+                time.sleep(_retry_delay(attempt, backoff))
+                continue
+            yield {
+                "status": "error",
+                "id": id,
+                "url": url,
+                "message": f"❌ {filename.name} is not a valid PDF: {str(e)}",
             }
             return
         except requests.RequestException as e:
-            if attempt < max_retries:
-                time.sleep(2)
+            # The partial file is kept, the next attempt continues it
+            response = getattr(e, "response", None)
+            retryable = response is None or response.status_code in RETRY_STATUS
+            if retryable and attempt < max_retries:
+                time.sleep(_retry_delay(attempt, backoff, response))
                 continue
             else:
                 yield {
                     "status": "error",
                     "id": id,
                     "url": url,
-                    "message": f"❌ Failed to download {filename.name if filename else 'file' } after {max_retries} attempts: {str(e)}",
+                    "message": f"❌ Failed to download {filename.name if filename else 'file' } after {attempt} attempts: {str(e)}",
                 }
+                return
+
+def _sniff_delimiter(dataset_file: str | Path):
+    """Detects the delimiter ("," or ";") of a CSV file from its first lines."""
+    with open(dataset_file, "r", encoding="utf-8", newline="") as f:
+        sample = f.read(8192)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;").delimiter
+    except csv.Error:
+        return ","
+
+
+def _dataset_format(dataset_file: str) -> str:
+    name = dataset_file.lower()
+    for dataset_format, extensions in EXTENSION.items():
+        if name.endswith(tuple(extensions) if isinstance(extensions, list) else extensions):
+            return dataset_format
+    raise ValueError("Unsupported file format. Please provide a CSV, Excel or Parquet file.")
 
-def read_dataset(dataset_file: str | Path) -> pd.DataFrame:
+
+def read_dataset(dataset_file: str | Path, columns: list[str] | None = None) -> pd.DataFrame:
     """
-    Read a dataset file (CSV or Excel) into a DataFrame.
+    Read a dataset file (CSV, Excel or Parquet) into a DataFrame.
 
     Args:
         dataset_file (str | Path): Path to the dataset file.
+        columns (list[str] | None): Columns to load, all by default.
 
     Returns:
         pd.DataFrame: Loaded dataset.
     """
     dataset_file = str(dataset_file)
-    if dataset_file.lower().endswith(EXTENSION["csv"]):
-        # Try to auto-detect delimiter ("," or ";")
-        with open(dataset_file, "r", encoding="utf-8") as f:
-            sample = f.read(2048)
-        comma_count = sample.count(",")
-        semicolon_count = sample.count(";")
-        delimiter = "," if comma_count >= semicolon_count else ";"
-        return pd.read_csv(dataset_file, delimiter=delimiter)
-    elif any(dataset_file.lower().endswith(ext) for ext in EXTENSION["xlsx"]):
-        return pd.read_excel(dataset_file)
+    dataset_format = _dataset_format(dataset_file)
+    if dataset_format == "csv":
+        return pd.read_csv(dataset_file, delimiter=_sniff_delimiter(dataset_file), usecols=columns)
+    elif dataset_format == "xlsx":
+        return pd.read_excel(dataset_file, usecols=columns)
+    return pd.read_parquet(dataset_file, columns=columns)
+
+
+def read_dataset_preview(dataset_file: str | Path, rows: int = 1) -> pd.DataFrame:
+    """
+    Reads the header and the first `rows` rows of a dataset file.
+
+    Meant for column pickers and samples, without loading the whole file.
+
+    Args:
+        dataset_file (str | Path): Path to the dataset file.
+        rows (int): Number of data rows to read.
+
+    Returns:
+        pd.DataFrame: All columns of the dataset, at most `rows` rows.
+    """
+    dataset_file = str(dataset_file)
+    dataset_format = _dataset_format(dataset_file)
+    if dataset_format == "csv":
+        return pd.read_csv(dataset_file, delimiter=_sniff_delimiter(dataset_file), nrows=rows)
+    elif dataset_format == "xlsx":
+        return pd.read_excel(dataset_file, nrows=rows)
+    elif pq is not None:
+        parquet_file = pq.ParquetFile(dataset_file)
+        batch = next(parquet_file.iter_batches(batch_size=rows), None)
+        if batch is None:
+            return parquet_file.schema_arrow.empty_table().to_pandas()
+        return batch.to_pandas()
+    return pd.read_parquet(dataset_file).head(rows)
+
+
+def _iter_excel_chunks(dataset_file: str, columns: list[str], chunk_size: int):
+    """Streams the rows of the first sheet with openpyxl in read-only mode."""
+    workbook = openpyxl.load_workbook(dataset_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell) if cell is not None else "" for cell in next(rows, ())]
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ValueError(f"Columns not found in dataset: {', '.join(missing)}")
+        positions = [header.index(column) for column in columns]
+
+        chunk = []
+        for row in rows:
+            chunk.append([row[position] if position < len(row) else None for position in positions])
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_dataset_chunks(
+    dataset_file: str | Path | pd.DataFrame,
+    columns: list[str],
+    chunk_size: int = DATASET_CHUNK_SIZE,
+):
+    """
+    Reads only `columns` of a dataset, `chunk_size` rows at a time.
+
+    CSV files are read with pandas chunks, .xlsx files with openpyxl in
+    read-only mode and Parquet files by record batches, so the whole file is
+    never held in memory.
+
+    Args:
+        dataset_file (str | Path | pd.DataFrame): Path to the dataset file, or
+            an already loaded dataset.
+        columns (list[str]): Columns to read.
+        chunk_size (int): Rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next rows, with only `columns`.
+    """
+    columns = list(dict.fromkeys(columns))
+    if isinstance(dataset_file, pd.DataFrame):
+        for start in range(0, len(dataset_file), chunk_size):
+            yield dataset_file[columns].iloc[start:start + chunk_size]
+        return
+
+    dataset_file = str(dataset_file)
+    dataset_format = _dataset_format(dataset_file)
+    if dataset_format == "csv":
+        yield from pd.read_csv(
+            dataset_file,
+            delimiter=_sniff_delimiter(dataset_file),
+            usecols=columns,
+            dtype=str,
+            chunksize=chunk_size,
+        )
+    elif dataset_format == "xlsx" and dataset_file.lower().endswith(".xlsx") and openpyxl is not None:
+        yield from _iter_excel_chunks(dataset_file, columns, chunk_size)
+    elif dataset_format == "parquet" and pq is not None:
+        parquet_file = pq.ParquetFile(dataset_file)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
     else:
-        raise ValueError("Unsupported file format. Please provide a CSV or Excel file.")
+        # Legacy .xls files (and formats without their optional reader) are read at once
+        yield read_dataset(dataset_file, columns)
+
+
+def iter_download_items(
+    dataset_file: str | Path | pd.DataFrame,
+    id_col: str,
+    url_col: str,
+    chunk_size: int = DATASET_CHUNK_SIZE,
+):
+    """
+    Yields the `(id, url)` pairs of a dataset lazily, each URL only once.
+
+    Empty URLs are dropped and duplicates are removed per chunk with vectorized
+    pandas operations, before any request is made.
+
+    Args:
+        dataset_file (str | Path | pd.DataFrame): The dataset.
+        id_col (str): Column name for the ID.
+        url_col (str): Column name for the URL.
+        chunk_size (int): Rows read at a time.
+
+    Yields:
+        tuple[str, str]: The ID and URL of the next PDF.
+    """
+    seen_urls = set()
+    for chunk in iter_dataset_chunks(dataset_file, [id_col, url_col], chunk_size):
+        urls = chunk[url_col].astype("string").str.strip()
+        keep = urls.notna() & (urls != "")
+        chunk = pd.DataFrame({"id": chunk[id_col].astype(str), "url": urls})[keep]
+        chunk = chunk.drop_duplicates(subset="url")
+        chunk = chunk[~chunk["url"].isin(seen_urls)]
+        seen_urls.update(chunk["url"])
+        yield from zip(chunk["id"], chunk["url"])
+
 
-def handle_pdf_download_from_dataset(dataset_file: str, id_col: str, url_col: str):
+def count_download_items(
+    dataset_file: str | Path | pd.DataFrame,
+    id_col: str,
+    url_col: str,
+    chunk_size: int = DATASET_CHUNK_SIZE,
+):
+    """Counts the PDFs `iter_download_items` yields, reading the dataset in chunks."""
+    return sum(1 for _ in iter_download_items(dataset_file, id_col, url_col, chunk_size))
+
+
+def download_many(
+    items,
+    workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    rate_per_host: float | None = DEFAULT_RATE_PER_HOST,
+    session: requests.Session = session,
+    output_dir: str | Path = TEMP_DIR_PDF,
+    revalidate: bool = False,
+):
     """
-    Download PDFs from a dataset CSV or Excel file.
+    Downloads PDFs on a thread pool sharing one pooled session.
+
+    Items are submitted lazily, so only a few of them are in flight at a time.
+    Items saved under the same file name (e.g. rows sharing an ID) never run
+    at the same time, as they would overwrite each other's partial download.
 
     Args:
-        dataset_file (str): Path to the dataset file.
+        items (Iterable[tuple[str, str]]): `(id, url)` pairs.
+        workers (int): Number of download threads.
+        per_host (int): Concurrent requests per host.
+        rate_per_host (float | None): Requests per second per host, None for no limit.
+        session (requests.Session): Session used for the requests.
+        output_dir (str | Path): Directory the PDFs are saved to.
+        revalidate (bool): Re-check already downloaded PDFs with conditional requests.
+
+    Yields:
+        dict: The status dicts of `download_pdf`, in completion order.
+    """
+    limiter = HostLimiter(per_host, rate_per_host)
+    workers = max(1, int(workers))
+
+    def task(id, url):
+        return list(download_pdf(
+            id, url, session=session, limiter=limiter, output_dir=output_dir, revalidate=revalidate
+        ))
+
+    items = iter(items)
+    deferred = []  # Items waiting for a download of the same file to finish
+    busy_names = set()
+
+    def next_item():
+        for position, item in enumerate(deferred):
+            if _target_name(*item) not in busy_names:
+                return deferred.pop(position)
+        return None
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {}
+        exhausted = False
+        while pending or deferred or not exhausted:
+            while len(pending) < workers * 2:
+                item = next_item()
+                if item is None:
+                    if exhausted or len(deferred) >= workers * 2:
+                        break
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    if _target_name(*item) in busy_names:
+                        deferred.append(item)
+                        continue
+                busy_names.add(_target_name(*item))
+                pending[pool.submit(task, *item)] = _target_name(*item)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                busy_names.discard(pending.pop(future))
+                yield from future.result()
+    finally:
+        # When the caller stops early, queued downloads are dropped instead of
+        # waited for; the ones already running finish in the background.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def handle_pdf_download_from_dataset(
+    dataset_file: str | Path | pd.DataFrame,
+    id_col: str,
+    url_col: str,
+    workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    rate_per_host: float | None = DEFAULT_RATE_PER_HOST,
+    revalidate: bool = False,
+):
+    """
+    Download PDFs from a dataset CSV, Excel or Parquet file.
+
+    The dataset is read in chunks and every URL is downloaded once.
+
+    Args:
+        dataset_file (str | Path | pd.DataFrame): Path to the dataset file, or
+            an already loaded dataset.
         id_col (str): Column name for the ID.
         url_col (str): Column name for the URL.
+        workers (int): Number of download threads.
+        per_host (int): Concurrent requests per host.
+        rate_per_host (float | None): Requests per second per host, None for no limit.
+        revalidate (bool): Re-check already downloaded PDFs with conditional requests.
 
     Yields:
         str: Status message for each download attempt.
     """
     ensure_temp_dir(TEMP_DIR)
-    df = read_dataset(dataset_file)
-    for _, row in df.iterrows():
-        id = str(row[id_col])
-        url = row[url_col]
-        for status in download_pdf(id, url):
-            yield status
-    
+    items = iter_download_items(dataset_file, id_col, url_col)
+    yield from download_many(items, workers, per_host, rate_per_host, revalidate=revalidate)
+
 
 def clear_temp_dir(dir_name: str | Path):
     """Clear the temporary directory when all processes are done."""
@@ -0,0 +1,161 @@
+"""Structural PDF checks done while a download streams in.
+
+The `%PDF` header and the Content-Type are checked on the first chunk, so
+HTML error pages and other non-PDF responses are dropped right away. Once the
+download is complete, the tail must hold the `startxref` / `%%EOF` trailer of
+a complete file; if all announced bytes arrived without one, MuPDF decides.
+Results are kept in a sidecar per file, keyed by its size and modification
+time, so later runs do not have to open the file again.
+"""
+
+import json
+import os
+from pathlib import Path
+
+PDF_MAGIC = b"%PDF-"
+HEADER_WINDOW = 1024  # The header may follow some junk bytes, but not many
+TAIL_WINDOW = 2048  # Bytes at the end of the file searched for the trailer
+NON_PDF_CONTENT_TYPES = ("text/html", "text/plain", "application/json", "application/xml")
+
+
+class InvalidPDFError(Exception):
+    """A download is not a (complete) PDF file.
+
+    Args:
+        message (str): What is wrong with the file.
+        retryable (bool): Whether downloading again may help, e.g. for a
+            truncated transfer, as opposed to a response that is no PDF at all.
+    """
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def check_content_type(content_type: str | None):
+    """Rejects responses whose Content-Type is clearly not a PDF."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in NON_PDF_CONTENT_TYPES:
+        raise InvalidPDFError(f"Response is {media_type}, not a PDF")
+
+
+class StreamValidator:
+    """Checks a PDF chunk by chunk while it is written to disk."""
+
+    def __init__(self):
+        self.size = 0
+        self._head = b""
+        self._tail = b""
+        self._header_found = False
+
+    def feed(self, chunk: bytes):
+        """
+        Checks the next chunk of the download.
+
+        Raises:
+            InvalidPDFError: If the first bytes hold no `%PDF-` header.
+        """
+        self.size += len(chunk)
+        if not self._header_found:
+            self._head = (self._head + chunk)[:HEADER_WINDOW]
+            if PDF_MAGIC in self._head:
+                self._header_found = True
+            elif len(self._head) >= HEADER_WINDOW:
+                raise InvalidPDFError("No %PDF header at the start of the file")
+        self._tail = (self._tail + chunk)[-TAIL_WINDOW:]
+
+    def resume(self, path: str | Path):
+        """Picks up the checks of a partial download that is continued."""
+        self.size = 0
+        with open(path, "rb") as file:
+            self.feed(file.read(HEADER_WINDOW))
+            size = os.path.getsize(path)
+            file.seek(max(HEADER_WINDOW, size - TAIL_WINDOW))
+            self._tail = (self._tail + file.read())[-TAIL_WINDOW:]
+        self.size = size
+
+    def finish(self, expected_size: int | None = None):
+        """
+        Checks the end of a complete download.
+
+        Args:
+            expected_size (int | None): Content-Length of the response, if known.
+
+        Returns:
+            bool: Whether the trailer was found. False only if all announced
+            bytes arrived without one, e.g. with junk after `%%EOF`; the
+            transfer is complete then, so the file needs a full check instead
+            of another download.
+
+        Raises:
+            InvalidPDFError: If the header is missing, fewer bytes arrived than
+                announced, or the trailer is missing from a transfer of
+                unknown length.
+        """
+        if not self._header_found:
+            raise InvalidPDFError("No %PDF header at the start of the file")
+        if expected_size is not None and self.size < expected_size:
+            raise InvalidPDFError(
+                f"Transfer ended after {self.size} of {expected_size} bytes", retryable=True
+            )
+        if b"%%EOF" not in self._tail or b"startxref" not in self._tail:
+            if expected_size is not None:
+                return False
+            raise InvalidPDFError("Missing startxref/%%EOF trailer, file is truncated", retryable=True)
+        return True
+
+
+def _sidecar_path(path: Path):
+    return path.parent.with_name(f"{path.parent.name}_validation") / f"{path.name}.json"
+
+
+def record_validation(path: str | Path, valid: bool, reason: str = "", checked_by: str = "stream"):
+    """
+    Stores the validation result of a file next to its directory.
+
+    Args:
+        path (str | Path): The validated file.
+        valid (bool): Whether the file passed.
+        reason (str): Why it failed.
+        checked_by (str): Which check produced the result.
+    """
+    path = Path(path)
+    stat = path.stat()
+    sidecar = _sidecar_path(path)
+    sidecar.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = sidecar.with_suffix(".tmp")
+    temp_path.write_text(
+        json.dumps({
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "valid": valid,
+            "reason": reason,
+            "checked_by": checked_by,
+        }),
+        encoding="utf-8",
+    )
+    os.replace(temp_path, sidecar)
+
+
+def cached_validation(path: str | Path):
+    """
+    Gets the stored validation result of a file.
+
+    Returns:
+        bool | None: The result, or None if the file was not validated or has
+        changed since.
+    """
+    path = Path(path)
+    try:
+        record = json.loads(_sidecar_path(path).read_text(encoding="utf-8"))
+        stat = path.stat()
+    except (OSError, ValueError):
+        return None
+    if record.get("size") != stat.st_size or record.get("mtime_ns") != stat.st_mtime_ns:
+        return None
+    return bool(record.get("valid"))
+
+
+def forget_validation(path: str | Path):
+    """Removes the stored validation result of a file."""
+    _sidecar_path(Path(path)).unlink(missing_ok=True)
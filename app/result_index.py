@@ -0,0 +1,133 @@
+"""Completion index of the extraction results.
+
+A small SQLite table records, per result file, whether its document is still
+being extracted or complete, with its page counts. The skip checks and the
+dashboard query it instead of parsing every result JSON or globbing the output
+directories. Results that are not indexed yet (e.g. from older runs) are
+checked the slow way once and then recorded.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Kept out of the results tree, which is zipped for download and wiped by the dashboard
+INDEX_PATH = Path("app/cache/result_index.sqlite")
+
+STATUS_RUNNING = "running"
+STATUS_COMPLETE = "complete"
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _key(result_path: str | Path):
+    return str(Path(result_path).resolve())
+
+
+class ResultIndex:
+    """
+    SQLite index of result files, shared by all processes writing results.
+
+    Args:
+        path (str | Path): The SQLite file.
+    """
+
+    def __init__(self, path: str | Path = INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                result_path TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                total_page INTEGER NOT NULL,
+                pages_done INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def _upsert(self, result_path, status, total_page, pages_done):
+        with self._lock:
+            # One statement per update, so readers never see a half-written row
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)",
+                (_key(result_path), status, total_page, pages_done, time.time()),
+            )
+            self._conn.commit()
+
+    def mark_running(self, result_path: str | Path, total_page: int, pages_done: int = 0):
+        """Records that a document is being extracted into `result_path`."""
+        self._upsert(result_path, STATUS_RUNNING, total_page, pages_done)
+
+    def mark_complete(self, result_path: str | Path, total_page: int):
+        """Records that all pages of a document are in `result_path`."""
+        self._upsert(result_path, STATUS_COMPLETE, total_page, total_page)
+
+    def get(self, result_path: str | Path):
+        """
+        Looks up a result file.
+
+        Returns:
+            dict | None: "status", "total_page" and "pages_done", or None if
+            the result is not indexed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, total_page, pages_done FROM documents WHERE result_path = ?",
+                (_key(result_path),),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "total_page": row[1], "pages_done": row[2]}
+
+    def has_complete(self, output_dir: str | Path):
+        """Whether any complete result is indexed below `output_dir`."""
+        prefix = os.path.join(str(Path(output_dir).resolve()), "")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result_path FROM documents WHERE status = ? AND result_path >= ? AND result_path < ?",
+                (STATUS_COMPLETE, prefix, prefix + "\uffff"),
+            ).fetchall()
+        # Results may have been deleted since they were indexed
+        return any(
+            Path(path).exists() or Path(path).with_suffix(".jsonl").exists()
+            for (path,) in rows
+        )
+
+    def remove(self, result_path: str | Path):
+        """Drops a result file from the index."""
+        with self._lock:
+            self._conn.execute("DELETE FROM documents WHERE result_path = ?", (_key(result_path),))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_result_index(path: str | Path = INDEX_PATH):
+    """
+    Gets the process-wide index for `path`, opening it on first use.
+
+    Args:
+        path (str | Path): The SQLite file.
+
+    Returns:
+        ResultIndex: The shared index instance.
+    """
+    key = _key(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = ResultIndex(path)
+            _indexes[key] = index
+        return index
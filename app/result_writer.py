@@ -0,0 +1,206 @@
+"""Streaming writer for extraction results.
+
+Pages are appended to a `<name>.jsonl` sidecar as soon as they are done, one
+JSON object per line, instead of rewriting the whole result JSON after every
+page. When the document is finished the sidecar is compacted once into the
+usual `<name>.json`:
+
+    {"content": [{"page": 1, ...}, ...], "total_page": 3, "total_time": 1.2}
+
+Lines holding a "page" key are page records, every other line carries
+document-level fields (the first one holds "total_page", the last one the
+fields passed to `finalize`), so a sidecar can be read on its own too.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from result_index import get_result_index
+
+
+def jsonl_path_for(json_path: str | Path):
+    """Returns the JSONL sidecar path belonging to a result JSON path."""
+    return Path(json_path).with_suffix(".jsonl")
+
+
+class ResultWriter:
+    """
+    Appends page records to a JSONL sidecar and compacts it into the final JSON.
+
+    Args:
+        json_path (str | Path): Path of the final result JSON.
+        total_page (int): Number of pages of the document.
+        fsync (bool): Call fsync after every record, so finished pages survive
+            a power loss and not only a crash of the process.
+        jsonl_only (bool): Keep only the JSONL sidecar, skip the compaction.
+        allow_nan (bool): Whether NaN values are allowed in the final JSON.
+        update_index (bool): Record the progress in the completion index.
+    """
+
+    def __init__(
+        self,
+        json_path: str | Path,
+        total_page: int,
+        fsync: bool = False,
+        jsonl_only: bool = False,
+        allow_nan: bool = True,
+        update_index: bool = True,
+    ):
+        self.json_path = Path(json_path)
+        self.jsonl_path = jsonl_path_for(json_path)
+        self.total_page = total_page
+        self.fsync = fsync
+        self.jsonl_only = jsonl_only
+        self.allow_nan = allow_nan
+        self.index = get_result_index() if update_index else None
+        self._file = None
+
+    def open(self, records=()):
+        """
+        Starts a new sidecar, replacing a previous one and the final JSON.
+
+        Args:
+            records (Iterable[dict]): Page records of an earlier run that are
+                carried over when resuming it.
+        """
+        self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.jsonl_path, "w", encoding="utf-8")
+        self._write({"total_page": self.total_page})
+        pages_done = 0
+        for record in records:
+            self._write(record)
+            pages_done += 1
+        # From here on the sidecar holds the current state of the result
+        self.json_path.unlink(missing_ok=True)
+        if self.index is not None:
+            self.index.mark_running(self.json_path, self.total_page, pages_done)
+        return self
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def append(self, record: dict):
+        """Appends one page record."""
+        self._write(record)
+
+    def finalize(self, fields: dict | None = None):
+        """
+        Records the document-level `fields` and writes the final result.
+
+        Returns:
+            Path: The final JSON, or the sidecar when `jsonl_only` is set.
+        """
+        if fields:
+            self._write(fields)
+        self.close()
+
+        if self.jsonl_only:
+            final_path = self.jsonl_path
+        else:
+            result = read_jsonl_result(self.jsonl_path)
+            temp_path = self.json_path.with_suffix(".json.tmp")
+            with open(temp_path, "w", encoding="utf-8") as json_file:
+                json.dump(result, json_file, ensure_ascii=False, indent=2, allow_nan=self.allow_nan)
+            os.replace(temp_path, self.json_path)
+            self.jsonl_path.unlink(missing_ok=True)
+            final_path = self.json_path
+
+        if self.index is not None:
+            self.index.mark_complete(self.json_path, self.total_page)
+        return final_path
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        # The sidecar is started by `open`, once the resumed records are known
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # On errors the sidecar is kept as it is, with all finished pages
+        self.close()
+
+
+def read_jsonl_result(jsonl_path: str | Path):
+    """
+    Reads a JSONL sidecar into the result JSON layout.
+
+    A truncated last line (e.g. from a crash while writing) is ignored.
+    """
+    result = {"content": []}
+    with open(jsonl_path, "r", encoding="utf-8") as jsonl_file:
+        for line in jsonl_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "page" in record:
+                result["content"].append(record)
+            else:
+                result.update(record)
+    return result
+
+
+def load_result(json_path: str | Path):
+    """
+    Loads an extraction result from its JSON, or from its JSONL sidecar.
+
+    Args:
+        json_path (str | Path): Path of the result JSON (or of the sidecar).
+
+    Returns:
+        dict | None: The result, or None if neither file exists.
+    """
+    json_path = Path(json_path)
+    if json_path.suffix == ".json" and json_path.exists():
+        return json.loads(json_path.read_text(encoding="utf-8"))
+
+    jsonl_path = jsonl_path_for(json_path)
+    if jsonl_path.exists():
+        return read_jsonl_result(jsonl_path)
+    return None
+
+
+def _is_valid_page_record(record, page: int):
+    return (
+        isinstance(record, dict)
+        and record.get("page") == page
+        and isinstance(record.get("content"), str)
+        and isinstance(record.get("duration"), (int, float))
+    )
+
+
+def load_completed_pages(json_path: str | Path, total_page: int):
+    """
+    Gets the pages an interrupted run already finished, for resuming it.
+
+    Only the leading run of valid records for pages 1, 2, ... is kept, so a
+    resumed run always continues right after the last page that was written
+    completely. Results of a document with another page count are ignored.
+
+    Args:
+        json_path (str | Path): Path of the result JSON.
+        total_page (int): Number of pages of the document.
+
+    Returns:
+        list[dict]: The reusable page records, in page order.
+    """
+    try:
+        result = load_result(json_path)
+    except (OSError, ValueError):
+        return []
+    if not isinstance(result, dict) or result.get("total_page") != total_page:
+        return []
+
+    records = []
+    for record in result.get("content") or []:
+        if not _is_valid_page_record(record, len(records) + 1):
+            break
+        records.append(record)
+    return records[:total_page]
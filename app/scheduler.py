@@ -0,0 +1,139 @@
+"""Runs the extraction pipelines for many PDFs in a pool of worker processes."""
+
+import os
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from helper import logging_process
+
+METHOD_DOCLING = "Docling"
+METHOD_PYMU_TESSERACT = "PyMuPDF + Tesseract"
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+
+# Set in every worker process by `_init_worker`
+_status_queue = None
+_cancel_event = None
+
+
+def _init_worker(method, number_thread, status_queue, cancel_event):
+    """Loads the models once per worker so the first PDF does not pay for it."""
+    global _status_queue, _cancel_event
+    _status_queue = status_queue
+    _cancel_event = cancel_event
+
+    from model_registry import get_yolo_model
+
+    get_yolo_model()
+    if method == METHOD_DOCLING:
+        from export_results import warmup
+
+        warmup(number_thread)
+
+
+def _run_job(method, pdf_path, options):
+    """Runs one PDF through its pipeline and forwards every status dict to the caller."""
+    if method == METHOD_DOCLING:
+        from export_results import process_pdf
+
+        logs = process_pdf(pdf_path, **options)
+    else:
+        from Pymu_Tesseract_Finetuned import process_pdf_pymu_tesseract
+
+        logs = process_pdf_pymu_tesseract(pdf_path, **options)
+
+    file_name = Path(pdf_path).name
+    for log in logs:
+        _status_queue.put({**log, "file": file_name})
+        if _cancel_event.is_set():
+            logs.close()
+            _status_queue.put({
+                **logging_process("info", f"Processing of {file_name} canceled."),
+                "file": file_name,
+            })
+            return False
+    return True
+
+
+def run_batch(
+    pdf_paths,
+    method: str,
+    workers: int = DEFAULT_WORKERS,
+    number_thread: int = 4,
+    should_cancel=None,
+    poll_interval: float = 0.5,
+    **options,
+):
+    """
+    Processes PDFs in a pool of worker processes, one PDF per task.
+
+    Args:
+        pdf_paths (Iterable[str | Path]): PDFs to process.
+        method (str): METHOD_DOCLING or METHOD_PYMU_TESSERACT.
+        workers (int): Number of worker processes.
+        number_thread (int): Threads per worker for Docling.
+        should_cancel (callable | None): Polled while waiting; returning True
+            stops queued PDFs and the running ones after their current page.
+        poll_interval (float): Seconds between cancellation checks.
+        **options: Keyword arguments for `process_pdf` / `process_pdf_pymu_tesseract`.
+
+    Yields:
+        dict: The status dicts of the pipelines, with the PDF "file" name added,
+        in the order the workers produce them.
+    """
+    pdf_paths = [str(path) for path in pdf_paths]
+    if method == METHOD_DOCLING:
+        options["number_thread"] = number_thread
+
+    # Spawned workers do not inherit torch / Docling state from the caller
+    context = multiprocessing.get_context("spawn")
+    status_queue = context.Queue()
+    cancel_event = context.Event()
+
+    pool = ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(pdf_paths) or 1)),
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(method, number_thread, status_queue, cancel_event),
+    )
+    try:
+        futures = {
+            pool.submit(_run_job, method, pdf_path, options): pdf_path
+            for pdf_path in pdf_paths
+        }
+        pending = set(futures)
+
+        while pending:
+            if should_cancel is not None and not cancel_event.is_set() and should_cancel():
+                cancel_event.set()
+                for future in pending:
+                    future.cancel()
+
+            try:
+                yield status_queue.get(timeout=poll_interval)
+            except queue.Empty:
+                pass
+
+            for future in [f for f in pending if f.done()]:
+                pending.discard(future)
+                if future.cancelled():
+                    continue
+                error = future.exception()
+                if error is not None:
+                    file_name = Path(futures[future]).name
+                    yield {
+                        **logging_process("error", f"Failed to process PDF {file_name}: {error}"),
+                        "file": file_name,
+                    }
+
+        # Messages put right before a worker finished may still be in flight
+        while True:
+            try:
+                yield status_queue.get(timeout=poll_interval)
+            except queue.Empty:
+                break
+    finally:
+        # Also reached when the caller stops iterating (e.g. a Streamlit rerun)
+        cancel_event.set()
+        pool.shutdown(wait=True, cancel_futures=True)
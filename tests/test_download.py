@@ -0,0 +1,278 @@
+"""download_pdf and download_many against a local HTTP server."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pymupdf
+import pytest
+
+from http_client import create_session, save_http_metadata
+from pdf_process import _partial_path, download_many, download_pdf
+
+
+def _pdf_bytes(text="hello"):
+    with pymupdf.open() as doc:
+        for _ in range(3):
+            doc.new_page().insert_text((72, 72), text * 20)
+        return doc.tobytes()
+
+
+PDF = _pdf_bytes()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+            count = sum(path == self.path for path, _ in server.requests)
+        status, headers, body = server.routes[self.path](self.headers, count)
+        self.send_response(status)
+        headers.setdefault("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.routes = {}
+    httpd.requests = []
+    httpd.lock = threading.Lock()
+    httpd.url = f"http://127.0.0.1:{httpd.server_port}"
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _serve_pdf(body=PDF, etag='"v1"'):
+    def respond(headers, count):
+        return 200, {"Content-Type": "application/pdf", "ETag": etag}, body
+    return respond
+
+
+def _download(server, path, tmp_path, **kwargs):
+    kwargs.setdefault("backoff", 0)
+    return list(download_pdf(
+        "doc", server.url + path, session=create_session(), output_dir=tmp_path / "pdf", **kwargs
+    ))
+
+
+def test_download_success(server, tmp_path):
+    server.routes["/doc.pdf"] = _serve_pdf()
+
+    statuses = _download(server, "/doc.pdf", tmp_path)
+
+    assert [status["status"] for status in statuses] == ["success"]
+    assert (tmp_path / "pdf" / "doc.pdf").read_bytes() == PDF
+    assert not _partial_path(tmp_path / "pdf" / "doc.pdf").exists()
+
+
+def test_cached_file_is_not_downloaded_again(server, tmp_path):
+    server.routes["/doc.pdf"] = _serve_pdf()
+    _download(server, "/doc.pdf", tmp_path)
+
+    statuses = _download(server, "/doc.pdf", tmp_path)
+
+    assert [status["status"] for status in statuses] == ["info"]
+    assert len(server.requests) == 1
+
+
+def test_server_error_is_retried(server, tmp_path):
+    def respond(headers, count):
+        if count == 1:
+            return 503, {"Content-Type": "text/html"}, b"<html>busy</html>"
+        return 200, {"Content-Type": "application/pdf"}, PDF
+    server.routes["/doc.pdf"] = respond
+
+    statuses = _download(server, "/doc.pdf", tmp_path)
+
+    assert [status["status"] for status in statuses] == ["success"]
+    assert len(server.requests) == 2
+
+
+def test_client_error_is_not_retried(server, tmp_path):
+    server.routes["/doc.pdf"] = lambda headers, count: (404, {}, b"not found")
+
+    statuses = _download(server, "/doc.pdf", tmp_path)
+
+    assert [status["status"] for status in statuses] == ["error"]
+    assert len(server.requests) == 1
+
+
+def test_retries_give_up_with_one_error(server, tmp_path):
+    server.routes["/doc.pdf"] = lambda headers, count: (500, {}, b"oops")
+
+    statuses = _download(server, "/doc.pdf", tmp_path, max_retries=3)
+
+    assert [status["status"] for status in statuses] == ["error"]
+    assert len(server.requests) == 3
+
+
+def test_download_many_yields_one_status_per_item(server, tmp_path):
+    for name in ("a", "b", "c"):
+        server.routes[f"/{name}.pdf"] = _serve_pdf()
+    server.routes["/missing.pdf"] = lambda headers, count: (404, {}, b"not found")
+    items = [(name, f"{server.url}/{name}.pdf") for name in ("a", "b", "c", "missing")]
+
+    statuses = list(download_many(
+        items, workers=3, rate_per_host=None, session=create_session(), output_dir=tmp_path / "pdf"
+    ))
+
+    assert sorted(status["id"] for status in statuses) == ["a", "b", "c", "missing"]
+    assert {status["id"]: status["status"] for status in statuses}["missing"] == "error"
+    for name in ("a", "b", "c"):
+        assert (tmp_path / "pdf" / f"{name}.pdf").read_bytes() == PDF
+
+
+def test_download_many_serializes_duplicate_ids(server, tmp_path):
+    active = []
+    overlapped = []
+
+    def respond(headers, count):
+        with server.lock:
+            active.append(count)
+            overlapped.append(len(active) > 1)
+        try:
+            # Long enough for a concurrent download of the same file to show up
+            threading.Event().wait(0.2)
+            return 200, {"Content-Type": "application/pdf"}, PDF
+        finally:
+            with server.lock:
+                active.remove(count)
+    server.routes["/one.pdf"] = respond
+    server.routes["/two.pdf"] = respond
+    items = [("dup", f"{server.url}/one.pdf"), ("dup", f"{server.url}/two.pdf")]
+
+    statuses = list(download_many(
+        items, workers=2, rate_per_host=None, session=create_session(), output_dir=tmp_path / "pdf"
+    ))
+
+    assert len(statuses) == 2
+    assert {status["status"] for status in statuses} <= {"success", "info"}
+    assert not any(overlapped)
+    assert (tmp_path / "pdf" / "dup.pdf").read_bytes() == PDF
+
+
+def test_non_pdf_content_type_is_rejected(server, tmp_path):
+    server.routes["/doc.pdf"] = lambda headers, count: (
+        200, {"Content-Type": "text/html; charset=utf-8"}, b"<html>login</html>"
+    )
+
+    statuses = _download(server, "/doc.pdf", tmp_path)
+
+    assert [status["status"] for status in statuses] == ["error"]
+    assert len(server.requests) == 1
+    assert not (tmp_path / "pdf" / "doc.pdf").exists()
+
+
+def test_truncated_transfer_is_retried(server, tmp_path):
+    def respond(headers, count):
+        # The first response announces the whole file but stops early
+        body = PDF[:-200] if count == 1 else PDF
+        return 200, {"Content-Type": "application/pdf", "Content-Length": str(len(PDF))}, body
+    server.routes["/doc.pdf"] = respond
+
+    statuses = _download(server, "/doc.pdf", tmp_path)
+
+    assert [status["status"] for status in statuses] == ["success"]
+    assert len(server.requests) == 2
+    assert (tmp_path / "pdf" / "doc.pdf").read_bytes() == PDF
+
+
+def test_complete_file_without_eof_marker_is_checked_by_mupdf(server, tmp_path):
+    body = PDF[:PDF.rindex(b"%%EOF")]
+    server.routes["/doc.pdf"] = _serve_pdf(body)
+
+    statuses = _download(server, "/doc.pdf", tmp_path)
+
+    assert [status["status"] for status in statuses] == ["success"]
+    assert len(server.requests) == 1
+    sidecar = tmp_path / "pdf_validation" / "doc.pdf.json"
+    assert '"checked_by": "mupdf"' in sidecar.read_text(encoding="utf-8")
+
+
+def test_complete_file_mupdf_cannot_read_is_not_retried(server, tmp_path):
+    server.routes["/doc.pdf"] = _serve_pdf(PDF[:-300])
+
+    statuses = _download(server, "/doc.pdf", tmp_path)
+
+    assert [status["status"] for status in statuses] == ["error"]
+    assert len(server.requests) == 1
+    assert not (tmp_path / "pdf" / "doc.pdf").exists()
+
+
+def _save_partial(tmp_path, server, size, etag='"v1"'):
+    part_path = _partial_path(tmp_path / "pdf" / "doc.pdf")
+    part_path.write_bytes(PDF[:size])
+    save_http_metadata(part_path, server.url + "/doc.pdf", etag, None, len(PDF))
+    return part_path
+
+
+def test_partial_download_is_resumed(server, tmp_path):
+    (tmp_path / "pdf").mkdir()
+    _save_partial(tmp_path, server, 1200)
+
+    def respond(headers, count):
+        if headers.get("Range") == "bytes=1200-" and headers.get("If-Range") == '"v1"':
+            return 206, {
+                "Content-Type": "application/pdf",
+                "ETag": '"v1"',
+                "Content-Range": f"bytes 1200-{len(PDF) - 1}/{len(PDF)}",
+            }, PDF[1200:]
+        return 200, {"Content-Type": "application/pdf", "ETag": '"v1"'}, PDF
+    server.routes["/doc.pdf"] = respond
+
+    statuses = _download(server, "/doc.pdf", tmp_path)
+
+    assert [status["status"] for status in statuses] == ["success"]
+    assert server.requests[0][1].get("Range") == "bytes=1200-"
+    assert (tmp_path / "pdf" / "doc.pdf").read_bytes() == PDF
+
+
+def test_rejected_range_restarts_the_download(server, tmp_path):
+    (tmp_path / "pdf").mkdir()
+    part_path = _save_partial(tmp_path, server, 1200)
+
+    def respond(headers, count):
+        if headers.get("Range"):
+            return 416, {"Content-Range": f"bytes */{len(PDF)}"}, b""
+        return 200, {"Content-Type": "application/pdf", "ETag": '"v2"'}, PDF
+    server.routes["/doc.pdf"] = respond
+
+    # Restarting must not need another attempt
+    statuses = _download(server, "/doc.pdf", tmp_path, max_retries=1)
+
+    assert [status["status"] for status in statuses] == ["success"]
+    assert len(server.requests) == 2
+    assert "Range" not in server.requests[1][1]
+    assert (tmp_path / "pdf" / "doc.pdf").read_bytes() == PDF
+    assert not part_path.exists()
+    assert not (tmp_path / "pdf_partial_http" / "doc.pdf.part.json").exists()
+
+
+def test_changed_file_is_downloaded_again_on_revalidation(server, tmp_path):
+    server.routes["/doc.pdf"] = _serve_pdf(etag='"v1"')
+    _download(server, "/doc.pdf", tmp_path)
+    new_pdf = _pdf_bytes("changed")
+
+    def respond(headers, count):
+        if headers.get("If-None-Match") == '"v2"':
+            return 304, {}, b""
+        return 200, {"Content-Type": "application/pdf", "ETag": '"v2"'}, new_pdf
+    server.routes["/doc.pdf"] = respond
+
+    statuses = _download(server, "/doc.pdf", tmp_path, revalidate=True)
+    assert [status["status"] for status in statuses] == ["success"]
+    assert (tmp_path / "pdf" / "doc.pdf").read_bytes() == new_pdf
+
+    statuses = _download(server, "/doc.pdf", tmp_path, revalidate=True)
+    assert [status["status"] for status in statuses] == ["info"]
+    assert server.requests[-1][1].get("If-None-Match") == '"v2"'
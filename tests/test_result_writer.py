@@ -0,0 +1,158 @@
+"""ResultWriter streams pages to a JSONL sidecar and compacts it once at the end."""
+
+import json
+
+import pytest
+
+from result_index import STATUS_COMPLETE, STATUS_RUNNING, get_result_index
+from result_writer import (
+    ResultWriter,
+    jsonl_path_for,
+    load_completed_pages,
+    load_result,
+    read_jsonl_result,
+)
+
+
+@pytest.fixture(autouse=True)
+def _work_dir(tmp_path, monkeypatch):
+    # The result index lives at a path relative to the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+def _record(page):
+    return {"page": page, "content": f"page {page}", "confidence": 90.0, "duration": 0.5}
+
+
+def test_finalize_compacts_sidecar_into_json(tmp_path):
+    json_path = tmp_path / "doc.json"
+    writer = ResultWriter(json_path, total_page=2).open()
+    writer.append(_record(1))
+    writer.append(_record(2))
+    final_path = writer.finalize({"total_time": 1.0})
+
+    assert final_path == json_path
+    assert json.loads(json_path.read_text(encoding="utf-8")) == {
+        "content": [_record(1), _record(2)],
+        "total_page": 2,
+        "total_time": 1.0,
+    }
+    assert not jsonl_path_for(json_path).exists()
+
+
+def test_jsonl_only_keeps_sidecar(tmp_path):
+    json_path = tmp_path / "doc.json"
+    json_path.write_text('{"content": [], "total_page": 1}', encoding="utf-8")
+    writer = ResultWriter(json_path, total_page=1, jsonl_only=True).open()
+    writer.append(_record(1))
+    final_path = writer.finalize({"total_time": 0.5})
+
+    assert final_path == jsonl_path_for(json_path)
+    # A stale JSON from an earlier run must not shadow the new sidecar
+    assert not json_path.exists()
+    assert load_result(json_path)["content"] == [_record(1)]
+
+
+def test_close_without_finalize_keeps_finished_pages(tmp_path):
+    json_path = tmp_path / "doc.json"
+    writer = ResultWriter(json_path, total_page=3).open()
+    writer.append(_record(1))
+    writer.close()
+
+    assert not json_path.exists()
+    assert load_result(json_path) == {"content": [_record(1)], "total_page": 3}
+
+
+def test_open_replaces_previous_sidecar(tmp_path):
+    json_path = tmp_path / "doc.json"
+    writer = ResultWriter(json_path, total_page=2).open()
+    writer.append(_record(1))
+    writer.close()
+
+    writer = ResultWriter(json_path, total_page=2).open()
+    writer.close()
+
+    assert load_result(json_path) == {"content": [], "total_page": 2}
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    jsonl_path = tmp_path / "doc.jsonl"
+    jsonl_path.write_text(
+        '{"total_page": 2}\n' + json.dumps(_record(1)) + '\n{"page": 2, "cont',
+        encoding="utf-8",
+    )
+
+    assert read_jsonl_result(jsonl_path) == {"content": [_record(1)], "total_page": 2}
+
+
+def test_open_carries_over_resumed_records(tmp_path):
+    json_path = tmp_path / "doc.json"
+    json_path.write_text('{"content": [], "total_page": 2}', encoding="utf-8")
+    writer = ResultWriter(json_path, total_page=2).open([_record(1)])
+
+    # From here on the sidecar holds the result, not the old JSON
+    assert not json_path.exists()
+    writer.append(_record(2))
+    writer.finalize()
+
+    assert load_result(json_path)["content"] == [_record(1), _record(2)]
+
+
+def test_load_completed_pages_keeps_leading_valid_records(tmp_path):
+    json_path = tmp_path / "doc.json"
+    writer = ResultWriter(json_path, total_page=4).open()
+    writer.append(_record(1))
+    writer.append(_record(2))
+    writer.append(_record(4))
+    writer.close()
+
+    assert load_completed_pages(json_path, 4) == [_record(1), _record(2)]
+
+
+def test_load_completed_pages_stops_at_invalid_record(tmp_path):
+    json_path = tmp_path / "doc.json"
+    writer = ResultWriter(json_path, total_page=3).open()
+    writer.append(_record(1))
+    writer.append({"page": 2, "content": None, "duration": 0.5})
+    writer.append(_record(3))
+    writer.close()
+
+    assert load_completed_pages(json_path, 3) == [_record(1)]
+
+
+def test_load_completed_pages_reads_final_json(tmp_path):
+    json_path = tmp_path / "doc.json"
+    writer = ResultWriter(json_path, total_page=2).open()
+    writer.append(_record(1))
+    writer.append(_record(2))
+    writer.finalize({"total_time": 1.0})
+
+    assert load_completed_pages(json_path, 2) == [_record(1), _record(2)]
+
+
+def test_load_completed_pages_ignores_other_documents(tmp_path):
+    json_path = tmp_path / "doc.json"
+    writer = ResultWriter(json_path, total_page=2).open()
+    writer.append(_record(1))
+    writer.close()
+
+    assert load_completed_pages(json_path, 3) == []
+    assert load_completed_pages(tmp_path / "missing.json", 2) == []
+
+
+def test_load_completed_pages_ignores_corrupt_json(tmp_path):
+    json_path = tmp_path / "doc.json"
+    json_path.write_text('{"content": [', encoding="utf-8")
+
+    assert load_completed_pages(json_path, 2) == []
+
+
+def test_index_tracks_running_and_complete_results(tmp_path):
+    json_path = tmp_path / "doc.json"
+    index = get_result_index()
+    writer = ResultWriter(json_path, total_page=2).open([_record(1)])
+
+    assert index.get(json_path) == {"status": STATUS_RUNNING, "total_page": 2, "pages_done": 1}
+    writer.append(_record(2))
+    writer.finalize()
+    assert index.get(json_path) == {"status": STATUS_COMPLETE, "total_page": 2, "pages_done": 2}